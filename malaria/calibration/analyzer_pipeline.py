@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from malaria.reports.SpatialReportReader import SpatialReportChannel
+
+logger = logging.getLogger(__name__)
+
+
+def parse_output_file(path):
+    """
+    Parse one simulation output by extension: JSON reports to dicts, binary spatial
+    reports to (time, node) arrays, anything else to its raw text.
+    """
+    if path.endswith('.json'):
+        with open(path) as fin:
+            return json.load(fin)
+    if path.endswith('.bin'):
+        return np.array(SpatialReportChannel(path)[:])
+    with open(path) as fin:
+        return fin.read()
+
+
+class SharedOutputParser(object):
+    """
+    Stand-in for the per-analyzer output parser: exposes the files parsed once for the
+    simulation through raw_data, plus the simulation id and tags.
+    """
+
+    def __init__(self, sim_id, sim_data, raw_data):
+        self.sim_id = sim_id
+        self.sim_data = sim_data
+        self.raw_data = raw_data
+
+
+class AnalyzerPipeline(object):
+    """
+    Run many analyzers over simulation outputs, reading and parsing each output file once
+    per simulation no matter how many analyzers request it.
+
+    Analyzers follow the usual interface: a ``filenames`` list relative to the simulation
+    directory, an optional ``filter(sim_data)`` and ``apply(parser)`` reading
+    ``parser.raw_data[filename]``. The parsed data is shared, so analyzers must copy it
+    before modifying it.
+
+        pipeline = AnalyzerPipeline(prevalence_analyzer, density_analyzer, infectiousness_analyzer)
+        for sim_id, sim_dir, tags in simulations:
+            pipeline.process(sim_id, sim_dir, tags)
+        results = pipeline.results    # analyzer -> {sim_id: apply() output}
+    """
+
+    def __init__(self, *analyzers):
+        self.analyzers = list(analyzers)
+        self.results = OrderedDict((a, OrderedDict()) for a in self.analyzers)
+        self.files_parsed = 0
+        self.files_requested = 0
+        self.parse_time = 0.0
+
+    @property
+    def analyzers_by_file(self):
+        groups = OrderedDict()
+        for analyzer in self.analyzers:
+            for filename in analyzer.filenames:
+                groups.setdefault(filename, []).append(analyzer)
+        return groups
+
+    def _selected(self, sim_data):
+        return [a for a in self.analyzers if not hasattr(a, 'filter') or a.filter(sim_data)]
+
+    def process(self, sim_id, sim_dir, sim_data=None):
+        """
+        Parse the files needed by the analyzers selecting this simulation, then apply each
+        of them to the shared parsed data.
+        """
+        sim_data = sim_data or {}
+        selected = self._selected(sim_data)
+
+        raw_data = {}
+        t0 = time.time()
+        for filename in OrderedDict.fromkeys(f for a in selected for f in a.filenames):
+            raw_data[filename] = parse_output_file(os.path.join(sim_dir, filename))
+        self.parse_time += time.time() - t0
+        self.files_parsed += len(raw_data)
+        self.files_requested += sum(len(a.filenames) for a in selected)
+
+        parser = SharedOutputParser(sim_id, sim_data, raw_data)
+        for analyzer in selected:
+            self.results[analyzer][sim_id] = analyzer.apply(parser)
+        return parser
+
+    def report(self):
+        return {
+            'files_parsed': self.files_parsed,
+            'files_requested': self.files_requested,
+            'parses_saved': self.files_requested - self.files_parsed,
+            'parse_time': self.parse_time
+        }
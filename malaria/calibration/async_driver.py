@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+class LocalJob(object):
+    """
+    Simulation stand-in running a command as a local subprocess.
+
+    :param command: argument list, e.g. [eradication_path, '-C', 'config.json']
+    :param working_dir: directory the command runs in (the simulation directory)
+    """
+
+    def __init__(self, command, working_dir=None):
+        self.command = command
+        self.working_dir = working_dir
+        self.returncode = None
+
+    async def run(self):
+        process = await asyncio.create_subprocess_exec(*self.command, cwd=self.working_dir,
+                                                       stdout=asyncio.subprocess.DEVNULL,
+                                                       stderr=asyncio.subprocess.DEVNULL)
+        self.returncode = await process.wait()
+        if self.returncode != 0:
+            raise Exception('Job %s failed with exit code %d' % (' '.join(self.command), self.returncode))
+        return self.working_dir
+
+
+class PythonJob(LocalJob):
+    """
+    LocalJob running a python snippet, for exercising the driver without EMOD.
+    """
+
+    def __init__(self, code, working_dir=None):
+        super(PythonJob, self).__init__([sys.executable, '-c', code], working_dir)
+
+
+class AsyncCalibration(object):
+    """
+    Barrier-free calibration loop: a fixed number of simulations is kept running, each one
+    is analyzed as soon as it completes, and the proposal is updated immediately so the
+    freed slot gets a fresh sample instead of waiting for the slowest simulation of an
+    iteration.
+
+    The calibration algorithm is supplied as callables:
+
+    - ``propose(n)``: return up to n new samples from the current proposal
+    - ``make_job(sample)``: return a job (e.g. :py:class:`LocalJob`) whose ``run()``
+      coroutine simulates the sample and returns its output directory
+    - ``analyze(sample, output)``: return the sample's log-likelihood
+    - ``update(sample, ll)`` (optional): incorporate one result into the proposal
+
+        driver = AsyncCalibration(propose, make_job, analyze, update, max_running=16)
+        results = driver.run(max_samples=500)   # [(sample, ll), ...] in completion order
+    """
+
+    def __init__(self, propose, make_job, analyze, update=None, max_running=None):
+        self.propose = propose
+        self.make_job = make_job
+        self.analyze = analyze
+        self.update = update
+        self.max_running = max_running or os.cpu_count() or 1
+        self.results = []
+        self.failed = []
+
+    async def _simulate(self, sample):
+        output = await self.make_job(sample).run()
+        # Analysis may be CPU-heavy: keep the event loop free to launch and reap jobs
+        return await asyncio.get_running_loop().run_in_executor(None, self.analyze, sample, output)
+
+    async def run_async(self, max_samples, stop=None):
+        """
+        :param max_samples: total number of simulations to run
+        :param stop: optional callable (results) -> True to stop launching new samples
+        """
+        running = {}
+        launched = 0
+
+        def fill():
+            nonlocal launched
+            free = min(self.max_running - len(running), max_samples - launched)
+            if free <= 0 or (stop and stop(self.results)):
+                return
+            for sample in self.propose(free):
+                running[asyncio.ensure_future(self._simulate(sample))] = sample
+                launched += 1
+
+        fill()
+        while running:
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                sample = running.pop(task)
+                try:
+                    ll = task.result()
+                except Exception as e:
+                    logger.warning('Sample %s failed: %s', sample, e)
+                    self.failed.append((sample, e))
+                    continue
+                self.results.append((sample, ll))
+                if self.update:
+                    self.update(sample, ll)
+            fill()
+            logger.debug('%d running, %d done, %d failed', len(running), len(self.results), len(self.failed))
+        return self.results
+
+    def run(self, max_samples, stop=None):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.run_async(max_samples, stop))
+        finally:
+            loop.close()
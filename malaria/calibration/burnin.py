@@ -0,0 +1,169 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Parameters that do not change the population state at the end of burn-in
+burnin_ignored_params = [
+    'Simulation_Duration',
+    'Serialization_Type', 'Serialization_Time_Steps',
+    'Serialized_Population_Path', 'Serialized_Population_Filenames',
+    'Enable_Default_Reporting', 'Enable_Spatial_Output', 'Spatial_Output_Channels',
+    'Enable_Property_Output', 'Custom_Reports_Filename', 'Report_Event_Recorder',
+    'Listed_Events', 'Config_Name'
+]
+
+
+def checkpoint_filename(burnin_days):
+    return 'state-%05d.dtk' % burnin_days
+
+
+def _coordinator(event):
+    return event.get('Event_Coordinator_Config', {})
+
+
+def _repetitions(event):
+    coordinator = _coordinator(event)
+    return coordinator.get('Number_Repetitions', 1), coordinator.get('Timesteps_Between_Repetitions', 0)
+
+
+def _last_day(event):
+    repetitions, interval = _repetitions(event)
+    if repetitions < 0 and interval > 0:
+        return float('inf')
+    return event['Start_Day'] + (repetitions - 1) * interval
+
+
+def burnin_events(cb, burnin_days):
+    """
+    Campaign events that start during burn-in.
+    """
+    return [e for e in cb.campaign['Events'] if e.get('Start_Day', 0) < burnin_days]
+
+
+def burnin_key(cb, burnin_days, ignored_params=None):
+    """
+    Hash of everything that determines the population at the end of burn-in: the config
+    parameters except reporting and duration, the campaign events starting before
+    burnin_days, and the burn-in length itself.
+    """
+    ignored = set(burnin_ignored_params if ignored_params is None else ignored_params)
+    parts = {
+        'burnin_days': burnin_days,
+        'parameters': {k: v for k, v in cb.config['parameters'].items() if k not in ignored},
+        'events': burnin_events(cb, burnin_days)
+    }
+    serialized = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+
+def burnin_config(cb, burnin_days):
+    """
+    Copy of cb that runs only the burn-in and serializes the population on its last day.
+    """
+    cb = copy.deepcopy(cb)
+    cb.update_params({
+        'Simulation_Duration': burnin_days,
+        'Serialization_Type': 'TIMESTEP',
+        'Serialization_Time_Steps': [burnin_days]
+    })
+    cb.campaign['Events'] = burnin_events(cb, burnin_days)
+    return cb
+
+
+def start_from_checkpoint(cb, checkpoint_path, burnin_days):
+    """
+    Make cb resume from a serialized burn-in population instead of simulating the burn-in.
+
+    The duration is shortened by burnin_days and the remaining campaign events are shifted
+    so day 0 of the new simulation is the end of burn-in. Events that finished during
+    burn-in are dropped (their effect is in the checkpoint); repeating events that span the
+    checkpoint keep only their remaining repetitions. Report start and end days are
+    shifted the same way.
+
+    :param checkpoint_path: directory containing the serialized population (the burn-in
+        simulation's output folder)
+    """
+    cb.update_params({
+        'Simulation_Duration': cb.get_param('Simulation_Duration') - burnin_days,
+        'Serialized_Population_Path': checkpoint_path,
+        'Serialized_Population_Filenames': [checkpoint_filename(burnin_days)]
+    })
+
+    events = []
+    for event in cb.campaign['Events']:
+        start = event.get('Start_Day', 0)
+        if start >= burnin_days:
+            event['Start_Day'] = start - burnin_days
+        elif _last_day(event) >= burnin_days:
+            repetitions, interval = _repetitions(event)
+            done = -(-(burnin_days - start) // interval)
+            event['Start_Day'] = start + done * interval - burnin_days
+            if repetitions > 0:
+                _coordinator(event)['Number_Repetitions'] = repetitions - done
+        else:
+            continue
+        events.append(event)
+    cb.campaign['Events'] = events
+
+    for report in getattr(cb, 'custom_reports', []):
+        for attr in ('start_day', 'end_day'):
+            day = getattr(report, attr, None)
+            if isinstance(day, (int, float)):
+                setattr(report, attr, max(0, day - burnin_days))
+    return cb
+
+
+class CheckpointLibrary(object):
+    """
+    JSON index of serialized burn-in populations by :py:func:`burnin_key`.
+
+        library = CheckpointLibrary('burnins.json')
+        key, cb, needs_burnin = library.prepare(cb, 50 * 365)
+        # needs_burnin: run cb (burn-in only), then library.add(key, output_path, 50 * 365)
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self.checkpoints = {}
+        if os.path.exists(index_path):
+            with open(index_path) as fin:
+                self.checkpoints = json.load(fin)
+
+    def save(self):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as fout:
+            json.dump(self.checkpoints, fout, indent=4, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def lookup(self, key):
+        """
+        :return: the checkpoint entry for key if its population file is still available, else None
+        """
+        entry = self.checkpoints.get(key)
+        if entry and os.path.exists(os.path.join(entry['path'], checkpoint_filename(entry['burnin_days']))):
+            return entry
+        return None
+
+    def add(self, key, output_path, burnin_days, **info):
+        entry = dict(info, path=output_path, burnin_days=burnin_days, created=time.strftime('%Y-%m-%d %H:%M:%S'))
+        self.checkpoints[key] = entry
+        self.save()
+        return entry
+
+    def prepare(self, cb, burnin_days):
+        """
+        :return: (key, cb, needs_burnin). If a checkpoint exists, cb is modified to start from
+            it; otherwise a burn-in-only copy of cb is returned to be run first.
+        """
+        key = burnin_key(cb, burnin_days)
+        entry = self.lookup(key)
+        if entry:
+            logger.info('Reusing burn-in checkpoint %s from %s', key, entry['path'])
+            return key, start_from_checkpoint(cb, entry['path'], burnin_days), False
+        logger.info('No burn-in checkpoint for %s: running %d day burn-in', key, burnin_days)
+        return key, burnin_config(cb, burnin_days), True
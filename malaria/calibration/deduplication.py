@@ -0,0 +1,129 @@
+import copy
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Output-only parameters: sims differing only in these can be merged by enabling the union
+reporting_params = [
+    'Enable_Default_Reporting', 'Enable_Spatial_Output', 'Spatial_Output_Channels',
+    'Enable_Property_Output', 'Enable_Demographics_Reporting', 'Report_Event_Recorder',
+    'Report_Event_Recorder_Events', 'Listed_Events', 'Custom_Reports_Filename', 'Config_Name'
+]
+
+
+def site_config(site, cb):
+    """
+    Copy of cb with the site's setup functions applied.
+    """
+    cb = copy.deepcopy(cb)
+    for fn in site.get_setup_functions():
+        fn(cb)
+    return cb
+
+
+def _reports(cb):
+    return list(getattr(cb, 'custom_reports', []))
+
+
+def _report_dict(report):
+    return report.to_dict() if hasattr(report, 'to_dict') else report
+
+
+def _report_id(report):
+    return json.dumps(_report_dict(report), sort_keys=True, default=str)
+
+
+def _report_output(report):
+    # Reports naming their output (the filtered reports' Report_File_Name) collide on that name;
+    # otherwise reports of the same type and description write to the same file
+    d = _report_dict(report)
+    if d.get('Report_File_Name'):
+        return 'Report_File_Name', d['Report_File_Name']
+    return getattr(report, 'type', None) or d.get('class'), d.get('Report_Description', d.get('Description'))
+
+
+def simulation_key(cb):
+    """
+    Hash of the simulation itself: config parameters (except reporting switches) and
+    campaign. Reports do not take part, so sims differing only in their outputs share a key.
+    """
+    parts = {
+        'parameters': {k: v for k, v in cb.config['parameters'].items() if k not in reporting_params},
+        'campaign': cb.campaign
+    }
+    serialized = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+
+class SharedSimulation(object):
+    """
+    One simulation config feeding the analyzers of every site merged into it.
+    """
+
+    def __init__(self, key, cb, site):
+        self.key = key
+        self.cb = cb
+        self.sites = [site]
+
+    @property
+    def analyzers(self):
+        return [a for site in self.sites for a in site.analyzers]
+
+    def can_merge(self, cb):
+        outputs = {_report_output(r): _report_id(r) for r in _reports(self.cb)}
+        for report in _reports(cb):
+            existing = outputs.get(_report_output(report))
+            if existing is not None and existing != _report_id(report):
+                return False
+        return True
+
+    def merge(self, site, cb):
+        """
+        Add the site's reports and reporting switches to the shared config.
+        """
+        known = set(_report_id(r) for r in _reports(self.cb))
+        for report in _reports(cb):
+            if _report_id(report) not in known:
+                self.cb.custom_reports.append(report)
+
+        for param in reporting_params:
+            value = cb.get_param(param, None)
+            current = self.cb.get_param(param, None)
+            if isinstance(value, list):
+                value = list(current or []) + [v for v in value if v not in (current or [])]
+            elif not value:
+                continue
+            self.cb.update_params({param: value})
+        self.sites.append(site)
+
+
+def deduplicate_sites(sites, cb):
+    """
+    Build each site's simulation from cb and merge the sites that produce identical
+    simulations into one, with the superset of their reports.
+
+    Sites are kept apart when they request different reports writing to the same output
+    file (e.g. two 'Monthly_Report' summary reports with different bins).
+
+    :param sites: calibration site instances
+    :param cb: base config builder with the sampled parameters already set
+    :return: list of :py:class:`SharedSimulation`, at most one per site
+    """
+    shared = []
+    for site in sites:
+        site_cb = site_config(site, cb)
+        key = simulation_key(site_cb)
+        for sim in shared:
+            if sim.key == key and sim.can_merge(site_cb):
+                sim.merge(site, site_cb)
+                break
+        else:
+            shared.append(SharedSimulation(key, site_cb, site))
+
+    logger.info('Deduplicated %d site simulations into %d', len(sites), len(shared))
+    for sim in shared:
+        if len(sim.sites) > 1:
+            logger.debug('Shared simulation %s: %s', sim.key, ', '.join(s.name for s in sim.sites))
+    return shared
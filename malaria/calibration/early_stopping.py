@@ -0,0 +1,157 @@
+import logging
+
+import numpy as np
+
+from malaria.reports.report_follower import watch_report
+
+logger = logging.getLogger(__name__)
+
+
+def reference_range(site, channel):
+    """
+    (min, max) of a reference channel over age bins, e.g. 'PfPR by Age Bin' of
+    NamawalaCalibSite or 'Annual Clinical Incidence by Age Bin' of DielmoCalibSite.
+    """
+    values = np.asarray(site.reference_dict[channel], dtype=float)
+    return values.min(), values.max()
+
+
+class OffTargetRule(object):
+    """
+    Flags a simulation whose interim value of a report channel is further than tolerance
+    outside the reference range: a factor for rates, an absolute margin for bounded channels.
+
+    :param name: label used in logs and decisions
+    :param value_fn: callable(latest) -> interim value, where latest is a dict of channel
+        name to (times, rows) of the most recent interval
+    :param low, high: reference range
+    :param tolerance: multiplicative slack: values in [low / tolerance, high * tolerance] pass;
+        with bounds, additive slack: values in [low - tolerance, high + tolerance] pass
+    :param bounds: (lower, upper) limits of a bounded channel such as prevalence, which make the
+        tolerance additive and clip the passing band to them
+    :param after_day: ignore interim values before this simulation day (e.g. burn-in transients)
+    """
+
+    def __init__(self, name, value_fn, low, high, tolerance=2.0, after_day=365 * 10, bounds=None):
+        self.name = name
+        self.value_fn = value_fn
+        self.low = low
+        self.high = high
+        self.tolerance = tolerance
+        self.after_day = after_day
+        self.bounds = bounds
+
+    @property
+    def band(self):
+        """
+        (min, max) interim values passing the rule
+        """
+        if self.bounds is None:
+            return self.low / self.tolerance, self.high * self.tolerance
+        return max(self.bounds[0], self.low - self.tolerance), min(self.bounds[1], self.high + self.tolerance)
+
+    def check(self, day, latest):
+        """
+        :return: the off-target interim value, or None if it is within tolerance or too early to tell
+        """
+        if day < self.after_day:
+            return None
+        value = self.value_fn(latest)
+        low, high = self.band
+        if value is None or low <= value <= high:
+            return None
+        return value
+
+
+def _latest_mean(channel):
+    def value(latest):
+        if channel not in latest:
+            return None
+        return float(np.mean(latest[channel][1][-1]))
+    return value
+
+
+def _annual_rate(events_channel, population_channel, interval):
+    def value(latest):
+        if events_channel not in latest or population_channel not in latest:
+            return None
+        population = np.sum(latest[population_channel][1][-1])
+        return float(np.sum(latest[events_channel][1][-1]) / population * 365.0 / interval) if population else None
+    return value
+
+
+def prevalence_rule(site, tolerance=0.1, after_day=365 * 10, channel='Parasite_Prevalence'):
+    """
+    Rule comparing the node-averaged interim prevalence with the site's 'PfPR by Age Bin'.
+    Prevalence is bounded by 1, so the tolerance is an absolute margin in prevalence.
+    """
+    low, high = reference_range(site, 'PfPR by Age Bin')
+    return OffTargetRule('%s PfPR' % site.name, _latest_mean(channel), low, high, tolerance, after_day, bounds=(0, 1))
+
+
+def incidence_rule(site, interval, tolerance=2.0, after_day=365 * 10,
+                   events_channel='New_Clinical_Cases', population_channel='Population'):
+    """
+    Rule comparing the interim annualized clinical incidence with the site's
+    'Annual Clinical Incidence by Age Bin'.
+
+    :param interval: days per report interval
+    """
+    low, high = reference_range(site, 'Annual Clinical Incidence by Age Bin')
+    return OffTargetRule('%s clinical incidence' % site.name,
+                         _annual_rate(events_channel, population_channel, interval),
+                         low, high, tolerance, after_day)
+
+
+class EarlyStopping(object):
+    """
+    Check interim report intervals against site reference ranges and stop hopeless runs.
+
+        stopping = EarlyStopping([prevalence_rule(NamawalaCalibSite())], kill=lambda sim_id: ..., dry_run=True)
+        stopping.watch(sim_id, {'Parasite_Prevalence': SpatialReportFollower(...)}, is_finished=...)
+        stopping.decisions   # what was (or in dry-run mode, would have been) stopped
+
+    :param rules: list of :py:class:`OffTargetRule`
+    :param kill: callable(sim_id, reasons) killing or deprioritizing the simulation
+    :param dry_run: only log and record what would have been stopped
+    """
+
+    def __init__(self, rules, kill=None, dry_run=False):
+        self.rules = rules
+        self.kill = kill
+        self.dry_run = dry_run or kill is None
+        self.decisions = []
+
+    def check(self, sim_id, day, latest):
+        """
+        :return: list of (rule name, interim value) violations; the simulation is stopped if not empty
+        """
+        reasons = []
+        for rule in self.rules:
+            value = rule.check(day, latest)
+            if value is not None:
+                reasons.append((rule.name, value))
+        if not reasons:
+            return reasons
+
+        self.decisions.append({'sim_id': sim_id, 'day': day, 'reasons': reasons, 'killed': not self.dry_run})
+        logger.info('%s simulation %s on day %d: %s', 'Would stop' if self.dry_run else 'Stopping', sim_id, day,
+                    ', '.join('%s = %.3g' % r for r in reasons))
+        if not self.dry_run:
+            self.kill(sim_id, reasons)
+        return reasons
+
+    def watch(self, sim_id, followers, **kwargs):
+        """
+        Follow a running simulation's reports and check every new interval.
+        Keyword arguments are passed to :any:`follow_report`.
+
+        :return: True if the simulation was flagged
+        """
+        latest = {}
+
+        def on_interval(channel, times, rows, aggregate):
+            latest[channel] = (times, rows)
+            return bool(self.check(sim_id, times[-1], latest))
+
+        return watch_report(followers, on_interval, **kwargs) is not None
@@ -0,0 +1,168 @@
+import logging
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+from scipy.stats import norm
+
+logger = logging.getLogger(__name__)
+
+
+class GaussianProcessEmulator(object):
+    """
+    Gaussian-process surrogate of parameters -> log-likelihood.
+
+    Uses a squared-exponential kernel with one length scale per parameter plus observation
+    noise (replicate scatter). Parameters are rescaled to [0, 1] using bounds, and
+    hyperparameters are fit by maximizing the marginal likelihood.
+    """
+
+    def __init__(self, bounds, n_restarts=3, seed=None):
+        """
+        :param bounds: list of (min, max) for each parameter
+        :param n_restarts: random restarts of the hyperparameter optimization
+        """
+        self.bounds = np.asarray(bounds, dtype=float)
+        self.n_restarts = n_restarts
+        self.rng = np.random.RandomState(seed)
+        self.theta = None
+
+    def _scale(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        return (X - self.bounds[:, 0]) / (self.bounds[:, 1] - self.bounds[:, 0])
+
+    def _kernel(self, A, B, theta):
+        length_scales = np.exp(theta[:-2])
+        signal = np.exp(theta[-2])
+        d = (A[:, None, :] - B[None, :, :]) / length_scales
+        return signal * np.exp(-0.5 * (d ** 2).sum(axis=-1))
+
+    def _neg_log_marginal_likelihood(self, theta, X, y):
+        K = self._kernel(X, X, theta) + (np.exp(theta[-1]) + 1e-8) * np.eye(len(X))
+        try:
+            c = cho_factor(K, lower=True)
+        except np.linalg.LinAlgError:
+            return 1e25
+        alpha = cho_solve(c, y)
+        return 0.5 * y.dot(alpha) + np.log(np.diag(c[0])).sum() + 0.5 * len(X) * np.log(2 * np.pi)
+
+    def fit(self, X, y):
+        """
+        :param X: (samples, parameters) array of evaluated parameter sets
+        :param y: log-likelihood of each sample
+        """
+        self.X = self._scale(X)
+        y = np.asarray(y, dtype=float)
+        self.y_mean = y.mean()
+        self.y_std = y.std() or 1.0
+        self.y = (y - self.y_mean) / self.y_std
+
+        n_params = self.X.shape[1]
+        # log length scales, log signal variance, log noise variance
+        limits = [(np.log(1e-2), np.log(10.0))] * n_params + [(np.log(1e-2), np.log(1e2)), (np.log(1e-6), np.log(1.0))]
+        starts = [np.concatenate([np.zeros(n_params), [0.0, np.log(1e-2)]])]
+        starts += [np.array([self.rng.uniform(lo, hi) for lo, hi in limits]) for _ in range(self.n_restarts)]
+
+        best = None
+        for theta0 in starts:
+            result = minimize(self._neg_log_marginal_likelihood, theta0, args=(self.X, self.y),
+                              method='L-BFGS-B', bounds=limits)
+            if best is None or result.fun < best.fun:
+                best = result
+        self.theta = best.x
+        self._update()
+        logger.debug('GP emulator fit on %d samples: length scales %s', len(self.X), np.exp(self.theta[:-2]))
+        return self
+
+    def _update(self):
+        K = self._kernel(self.X, self.X, self.theta) + (np.exp(self.theta[-1]) + 1e-8) * np.eye(len(self.X))
+        self._cho = cho_factor(K, lower=True)
+        self._alpha = cho_solve(self._cho, self.y)
+
+    def predict(self, X):
+        """
+        :return: (mean, standard deviation) of the emulated log-likelihood at X
+        """
+        Xs = self._scale(X)
+        k = self._kernel(Xs, self.X, self.theta)
+        mean = k.dot(self._alpha)
+        v = cho_solve(self._cho, k.T)
+        var = np.clip(np.exp(self.theta[-2]) - (k * v.T).sum(axis=1), 1e-12, None)
+        return mean * self.y_std + self.y_mean, np.sqrt(var) * self.y_std
+
+    def condition_on(self, X, y):
+        """
+        Add observations without refitting the hyperparameters.
+        """
+        self.X = np.vstack([self.X, self._scale(X)])
+        self.y = np.concatenate([self.y, (np.atleast_1d(y) - self.y_mean) / self.y_std])
+        self._update()
+
+
+def expected_improvement(mean, std, best, xi=0.01):
+    """
+    Expected improvement over best when maximizing the log-likelihood.
+    """
+    improvement = mean - best - xi
+    z = improvement / std
+    return improvement * norm.cdf(z) + std * norm.pdf(z)
+
+
+class MultiSiteEmulator(object):
+    """
+    One GP per calibration site; the total log-likelihood is the sum of the site emulators,
+    with their uncertainties treated as independent.
+    """
+
+    def __init__(self, bounds, sites, **kwargs):
+        self.bounds = np.asarray(bounds, dtype=float)
+        self.emulators = {site: GaussianProcessEmulator(bounds, **kwargs) for site in sites}
+
+    def fit(self, X, site_ll):
+        """
+        :param X: (samples, parameters) evaluated parameter sets
+        :param site_ll: dict of site name to the log-likelihood of each sample
+        """
+        for site, emulator in self.emulators.items():
+            emulator.fit(X, site_ll[site])
+        self.best = np.sum([site_ll[s] for s in self.emulators], axis=0).max()
+        return self
+
+    def predict(self, X):
+        predictions = [e.predict(X) for e in self.emulators.values()]
+        mean = np.sum([m for m, _ in predictions], axis=0)
+        std = np.sqrt(np.sum([s ** 2 for _, s in predictions], axis=0))
+        return mean, std
+
+    def condition_on_predictions(self, X):
+        for emulator in self.emulators.values():
+            emulator.condition_on(X, emulator.predict(X)[0])
+
+    def propose(self, n, n_candidates=5000, xi=0.01, seed=None):
+        """
+        Propose the next batch of parameter sets to send to EMOD by expected improvement.
+
+        The batch is chosen greedily: after each pick the emulators are conditioned on their
+        own prediction at that point ("kriging believer"), which spreads the batch out.
+
+        :param n: batch size
+        :param n_candidates: uniform random candidates within bounds to score on the surrogate
+        :return: (n, parameters) array
+        """
+        rng = np.random.RandomState(seed)
+        lo, hi = self.bounds[:, 0], self.bounds[:, 1]
+        candidates = lo + (hi - lo) * rng.uniform(size=(n_candidates, len(lo)))
+
+        saved = {s: (e.X.copy(), e.y.copy()) for s, e in self.emulators.items()}
+        batch = []
+        for _ in range(n):
+            mean, std = self.predict(candidates)
+            ei = expected_improvement(mean, std, self.best, xi)
+            i = int(np.argmax(ei))
+            batch.append(candidates[i])
+            self.condition_on_predictions(candidates[i:i + 1])
+            candidates = np.delete(candidates, i, axis=0)
+
+        for site, emulator in self.emulators.items():
+            emulator.X, emulator.y = saved[site]
+            emulator._update()
+        return np.array(batch)
@@ -0,0 +1,86 @@
+import numpy as np
+from scipy.special import gammaln, xlogy
+
+
+def dirichlet_multinomial(ref_counts, sim_counts, prior=1.0):
+    """
+    Dirichlet-multinomial log-likelihood of reference counts over categories.
+
+    The simulated counts plus a flat prior give the Dirichlet concentration for each category.
+
+    :param ref_counts: reference counts, categories on the last axis
+    :param sim_counts: simulated counts broadcastable against ref_counts, with extra leading axes
+    :param prior: pseudo-count added to every simulated category
+    :return: log-likelihood with the category axis summed out
+    """
+    x = np.asarray(ref_counts, dtype=float)
+    alpha = np.asarray(sim_counts, dtype=float) + prior
+    n = x.sum(axis=-1)
+    a = alpha.sum(axis=-1)
+    return (gammaln(n + 1) - gammaln(x + 1).sum(axis=-1)
+            + gammaln(a) - gammaln(n + a)
+            + (gammaln(x + alpha) - gammaln(alpha)).sum(axis=-1))
+
+
+def beta_binomial(ref_positive, ref_total, sim_positive, sim_total, prior=1.0):
+    """
+    Beta-binomial log-likelihood of reference prevalence counts per bin.
+
+    :param ref_positive: positive count per reference bin
+    :param ref_total: number sampled per reference bin
+    :param sim_positive: simulated positive count, broadcastable with extra leading axes
+    :param sim_total: simulated population per bin
+    :param prior: pseudo-count added to the simulated positives and negatives
+    :return: elementwise log-likelihood
+    """
+    k = np.asarray(ref_positive, dtype=float)
+    n = np.asarray(ref_total, dtype=float)
+    a = np.asarray(sim_positive, dtype=float) + prior
+    b = np.asarray(sim_total, dtype=float) - np.asarray(sim_positive, dtype=float) + prior
+    return (gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1)
+            + gammaln(k + a) + gammaln(n - k + b) - gammaln(n + a + b)
+            + gammaln(a + b) - gammaln(a) - gammaln(b))
+
+
+def gamma_poisson(ref_events, ref_exposure, sim_events, sim_exposure, prior_shape=1.0, prior_rate=0.0):
+    """
+    Gamma-Poisson (negative binomial) log-likelihood of reference event counts per bin.
+
+    The simulated events and person-time give a gamma posterior on the rate, which is
+    integrated against a Poisson count over the reference person-time.
+
+    :param ref_events: reference event count per bin (e.g. clinical cases)
+    :param ref_exposure: reference person-time per bin
+    :param sim_events: simulated event count, broadcastable with extra leading axes
+    :param sim_exposure: simulated person-time per bin
+    :return: elementwise log-likelihood
+    """
+    k = np.asarray(ref_events, dtype=float)
+    t = np.asarray(ref_exposure, dtype=float)
+    shape = np.asarray(sim_events, dtype=float) + prior_shape
+    rate = np.asarray(sim_exposure, dtype=float) + prior_rate
+    # Bins with no reference person-time contribute 0 (certainly no events) rather than NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = np.where(t > 0, t / (rate + t), 0.0)
+    return gammaln(k + shape) - gammaln(shape) - gammaln(k + 1) + shape * np.log1p(-p) + xlogy(k, p)
+
+
+def sum_over_bins(ll, leading_axes=2):
+    """
+    Total log-likelihood per entry of the leading axes, e.g. per (sample, replicate).
+
+    Simulated arrays carry the leading axes followed by the reference bin axes, so a whole
+    iteration is scored at once:
+
+        ll = dirichlet_multinomial(reference_counts, sim_counts)  # (samples, replicates, age bins)
+        score = sum_over_bins(ll)                                 # (samples, replicates)
+    """
+    ll = np.asarray(ll)
+    return ll.reshape(ll.shape[:leading_axes] + (-1,)).sum(axis=-1)
+
+
+def pool_replicates(sim, replicate_axis=1):
+    """
+    Sum simulated counts over replicates, keeping the axis so results still broadcast.
+    """
+    return np.asarray(sim, dtype=float).sum(axis=replicate_axis, keepdims=True)
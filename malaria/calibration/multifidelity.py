@@ -0,0 +1,121 @@
+import copy
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Short birth-cohort site -> long-duration site calibrated against the same village
+fidelity_pairs = {
+    'MatsariAgeSeasonCalibSiteBabies': 'MatsariAgeSeasonCalibSite',
+    'RafinMarkeAgeSeasonCalibSiteBabies': 'RafinMarkeAgeSeasonCalibSite',
+    'SugungumAgeSeasonCalibSiteBabies': 'SugungumAgeSeasonCalibSite'
+}
+
+
+def simulation_cost(site, cb):
+    """
+    Relative compute cost of one simulation of site: simulated days times the population
+    scale factor, read from a copy of cb after the site setup functions are applied.
+    """
+    cb = copy.deepcopy(cb)
+    for fn in site.get_setup_functions():
+        fn(cb)
+    return cb.get_param('Simulation_Duration', 365) * cb.get_param('Base_Population_Scale_Factor', 1)
+
+
+def promote(cheap_ll, fraction=0.25, threshold=None, min_promoted=1):
+    """
+    Pick the samples to run on the long-duration sites from their score on the cheap sites.
+
+    :param cheap_ll: total log-likelihood of each sample on the cheap sites
+    :param fraction: promote at most this fraction of samples, best first (None for no limit)
+    :param threshold: only promote samples within this many log-likelihood units of the best one
+    :param min_promoted: always promote at least this many samples
+    :return: sorted indices of the promoted samples
+    """
+    cheap_ll = np.asarray(cheap_ll, dtype=float)
+    order = np.argsort(-cheap_ll, kind='stable')
+    order = order[np.isfinite(cheap_ll[order])]
+
+    n = len(order)
+    if fraction is not None:
+        n = min(n, int(np.ceil(fraction * len(cheap_ll))))
+    if threshold is not None and len(order):
+        n = min(n, int((cheap_ll[order] >= cheap_ll[order[0]] - threshold).sum()))
+    n = max(n, min(min_promoted, len(order)))
+    return np.sort(order[:n])
+
+
+class MultiFidelityScreen(object):
+    """
+    Score every candidate on the short "Babies" sites first and send only the promising
+    ones to their long-duration counterparts.
+
+        screen = MultiFidelityScreen(fraction=0.2, threshold=50, cb=cb)
+        promoted = screen.select(cheap_ll)        # indices into this iteration's samples
+        ...run promoted samples on screen.expensive_sites...
+        logger.info(screen.report())
+    """
+
+    def __init__(self, cheap_sites=None, fraction=0.25, threshold=None, min_promoted=1, costs=None, cb=None):
+        """
+        :param cheap_sites: short site names to screen with; defaults to all of :py:data:`fidelity_pairs`
+        :param fraction: maximum fraction of samples promoted per iteration
+        :param threshold: maximum log-likelihood gap to the best cheap score for promotion
+        :param costs: dict of site name to relative cost per simulation
+        :param cb: config builder the calibration runs from; the cost of any site missing from
+            costs is computed from it with :py:func:`simulation_cost`
+        """
+        self.cheap_sites = list(cheap_sites or sorted(fidelity_pairs))
+        self.expensive_sites = [fidelity_pairs[s] for s in self.cheap_sites]
+        self.fraction = fraction
+        self.threshold = threshold
+        self.min_promoted = min_promoted
+        self.costs = dict(costs or {})
+        self.n_screened = 0
+        self.n_promoted = 0
+
+        missing = [s for s in self.cheap_sites + self.expensive_sites if s not in self.costs]
+        if missing and cb is None:
+            raise Exception('No cost for sites %s: pass costs or the config builder to compute them from'
+                            % ', '.join(missing))
+        if missing:
+            from malaria.study_sites.registry import get_site
+            for name in missing:
+                self.costs[name] = simulation_cost(get_site(name), cb)
+            logger.debug('Multi-fidelity site costs: %s', self.costs)
+
+    def cost(self, site_name):
+        return self.costs[site_name]
+
+    def select(self, cheap_ll):
+        """
+        :param cheap_ll: dict of cheap site name to log-likelihood per sample, or the summed array
+        :return: sorted indices of the samples to run on the expensive sites
+        """
+        if isinstance(cheap_ll, dict):
+            cheap_ll = np.sum([cheap_ll[s] for s in self.cheap_sites], axis=0)
+        promoted = promote(cheap_ll, self.fraction, self.threshold, self.min_promoted)
+        self.n_screened += len(cheap_ll)
+        self.n_promoted += len(promoted)
+        logger.info('Multi-fidelity screen promoted %d of %d samples', len(promoted), len(cheap_ll))
+        return promoted
+
+    def report(self):
+        """
+        Compute used by the screened calibration compared with running every sample on the
+        long-duration sites, in the units of :py:meth:`cost`.
+        """
+        cheap = sum(self.cost(s) for s in self.cheap_sites)
+        expensive = sum(self.cost(s) for s in self.expensive_sites)
+        used = self.n_screened * cheap + self.n_promoted * expensive
+        baseline = self.n_screened * expensive
+        return {
+            'screened': self.n_screened,
+            'promoted': self.n_promoted,
+            'cost': used,
+            'baseline_cost': baseline,
+            'saved': baseline - used,
+            'saved_fraction': (baseline - used) / float(baseline) if baseline else 0.0
+        }
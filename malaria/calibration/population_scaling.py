@@ -0,0 +1,106 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def population_scale_fn(scale_factor):
+    """
+    Setup function setting the simulated population scale.
+    """
+    return lambda cb: cb.update_params({'Base_Population_Scale_Factor': scale_factor})
+
+
+def ll_standard_error(replicate_ll):
+    """
+    :param replicate_ll: (samples, replicates) log-likelihoods
+    :return: standard error of the mean log-likelihood of each sample (inf with fewer than 2 replicates)
+    """
+    replicate_ll = np.atleast_2d(np.asarray(replicate_ll, dtype=float))
+    if replicate_ll.shape[1] < 2:
+        return np.full(replicate_ll.shape[0], np.inf)
+    return replicate_ll.std(axis=1, ddof=1) / np.sqrt(replicate_ll.shape[1])
+
+
+def required_scale(scale_factor, standard_error, target_se):
+    """
+    Scale factor expected to reach target_se, assuming the log-likelihood variance falls in
+    proportion to the simulated population.
+    """
+    return np.asarray(scale_factor, dtype=float) * (np.asarray(standard_error, dtype=float) / target_se) ** 2
+
+
+class AdaptivePopulation(object):
+    """
+    Start every sample at a small population and grow it only where replicate scatter
+    in the log-likelihood exceeds the target precision.
+
+        adaptive = AdaptivePopulation(initial_scale=1, target_se=2.0, max_scale=20)
+        scales = adaptive.start(n_samples)
+        while scales:                      # {sample index: scale factor} still to simulate
+            ...run replicates of each sample with population_scale_fn(scale)...
+            scales = adaptive.update(replicate_ll)   # {sample index: (replicates,) log-likelihoods}
+        ll = adaptive.ll
+    """
+
+    def __init__(self, initial_scale=1.0, target_se=1.0, max_scale=20.0, max_growth=4.0):
+        """
+        :param initial_scale: Base_Population_Scale_Factor of the first round
+        :param target_se: stop once the standard error of a sample's mean log-likelihood is below this
+        :param max_scale: never simulate a larger population than this
+        :param max_growth: largest increase of the scale factor in a single round
+        """
+        self.initial_scale = initial_scale
+        self.target_se = target_se
+        self.max_scale = max_scale
+        self.max_growth = max_growth
+
+    def start(self, n_samples):
+        self.scale = np.full(n_samples, float(self.initial_scale))
+        self.ll = np.full(n_samples, np.nan)
+        self.se = np.full(n_samples, np.inf)
+        self.cost = np.zeros(n_samples)
+        self.pending = set(range(n_samples))
+        return {i: self.scale[i] for i in sorted(self.pending)}
+
+    def update(self, replicate_ll):
+        """
+        Record the replicates of the pending samples and choose the next scale factors.
+
+        :param replicate_ll: dict of sample index to that sample's replicate log-likelihoods
+            at its current scale factor
+        :return: dict of sample index to the scale factor to simulate next; empty when done
+        """
+        for i, ll in replicate_ll.items():
+            ll = np.asarray(ll, dtype=float)
+            self.ll[i] = ll.mean()
+            self.se[i] = ll_standard_error(ll[None, :])[0]
+            self.cost[i] += self.scale[i] * len(ll)
+
+            if self.se[i] <= self.target_se or self.scale[i] >= self.max_scale:
+                self.pending.discard(i)
+                continue
+            needed = required_scale(self.scale[i], self.se[i], self.target_se)
+            self.scale[i] = min(needed, self.scale[i] * self.max_growth, self.max_scale)
+
+        logger.info('Adaptive population: %d of %d samples need a larger population',
+                    len(self.pending), len(self.scale))
+        return {i: self.scale[i] for i in sorted(self.pending)}
+
+    def report(self, fixed_scale=None, replicates=None):
+        """
+        Population-weighted compute spent compared with running every sample at fixed_scale
+        (default max_scale) with the given number of replicates.
+        """
+        fixed_scale = self.max_scale if fixed_scale is None else fixed_scale
+        replicates = replicates or 1
+        cost = float(self.cost.sum())
+        baseline = float(fixed_scale * replicates * len(self.scale))
+        return {
+            'cost': cost,
+            'baseline_cost': baseline,
+            'saved_fraction': 1 - cost / baseline,
+            'converged': int((self.se <= self.target_se).sum()),
+            'at_max_scale': int((self.scale >= self.max_scale).sum())
+        }
@@ -0,0 +1,205 @@
+import copy
+import logging
+
+import numpy as np
+
+from dtk.interventions.irs import node_irs_config
+
+from malaria.study_sites.household_inputs import coverage_table
+
+logger = logging.getLogger(__name__)
+
+itn_config = {
+    "class": "SimpleBednet",
+    "Bednet_Type": "ITN",
+    "Blocking_Config": {
+        "class": "WaningEffectExponential",
+        "Initial_Effect": 0.9,
+        "Decay_Time_Constant": 730
+    },
+    "Killing_Config": {
+        "class": "WaningEffectExponential",
+        "Initial_Effect": 0.6,
+        "Decay_Time_Constant": 1460
+    },
+    "Usage_Config": {
+        "class": "WaningEffectRandomBox",
+        "Initial_Effect": 1.0,
+        "Expected_Discard_Time": 3650
+    },
+    "Cost_To_Consumer": 3.75
+}
+
+def coverage_buckets(coverage, n_buckets=20, min_coverage=0.0):
+    """
+    Quantize per-node coverage into at most n_buckets equal-width buckets on [0, 1].
+
+    Each bucket is represented by the mean coverage of its nodes, so total expected
+    coverage is preserved and no node is off by more than one bucket width. With
+    n_buckets=None coverage is kept exact: nodes share a bucket only if their coverage is equal.
+
+    :param coverage: array of per-node coverage
+    :param min_coverage: nodes at or below this coverage get no bucket (index -1)
+    :return: (bucket index per node, representative coverage per bucket)
+    """
+    coverage = np.clip(np.asarray(coverage, dtype=float), 0, 1)
+    if n_buckets is None:
+        levels, index = np.unique(coverage, return_inverse=True)
+        index = index.reshape(coverage.shape)
+        used = levels > min_coverage
+        return np.where(used[index], np.cumsum(used)[index] - 1, -1), levels[used]
+
+    edges = np.linspace(0, 1, n_buckets + 1)
+    index = np.clip(np.searchsorted(edges, coverage, side='right') - 1, 0, n_buckets - 1)
+    index[coverage <= min_coverage] = -1
+
+    used = np.unique(index[index >= 0])
+    levels = np.array([coverage[index == b].mean() for b in used])
+    # Renumber so buckets are 0..len(used) - 1
+    index = np.where(index >= 0, np.searchsorted(used, index), -1)
+    return index, levels
+
+
+def bucketed_node_events(node_ids, coverage, intervention, start_days, scales=None, n_buckets=20,
+                         coverage_key='Demographic_Coverage', event_name='Bucketed node coverage', birth_triggered=None):
+    """
+    Campaign events distributing an intervention with node-specific coverage: one event per
+    (coverage bucket, start day) targeting a NodeSetNodeList, instead of one per node.
+
+    :param node_ids: node id of each coverage entry
+    :param coverage: per-node coverage
+    :param intervention: intervention config to distribute
+    :param start_days: distribution days
+    :param scales: optional multiplier of the node coverage per start day (e.g. the fraction
+        of nets distributed in each period)
+    :param coverage_key: 'Demographic_Coverage' for individual interventions, or a key of the
+        intervention config holding its coverage (e.g. 'Spray_Coverage' for node-level IRS)
+    :param birth_triggered: optional (start day, duration, scale) of a distribution to newborns
+        at the scaled node coverage, for individual interventions
+    :return: list of campaign event dicts
+    """
+    node_ids = np.asarray(node_ids)
+    index, levels = coverage_buckets(coverage, n_buckets)
+    scales = [1.0] * len(start_days) if scales is None else scales
+
+    events = []
+    for day, scale in zip(start_days, scales):
+        if scale <= 0:
+            continue
+        for b, level in enumerate(levels):
+            config = copy.deepcopy(intervention)
+            coordinator = {
+                "class": "StandardInterventionDistributionEventCoordinator",
+                "Intervention_Config": config
+            }
+            if coverage_key == 'Demographic_Coverage':
+                coordinator['Demographic_Coverage'] = min(1.0, level * scale)
+            else:
+                config[coverage_key] = min(1.0, level * scale)
+            events.append({
+                "Event_Name": "%s %d" % (event_name, b),
+                "class": "CampaignEvent",
+                "Start_Day": day,
+                "Event_Coordinator_Config": coordinator,
+                "Nodeset_Config": {
+                    "class": "NodeSetNodeList",
+                    "Node_List": [int(n) for n in node_ids[index == b]]
+                }
+            })
+
+    if birth_triggered is not None and birth_triggered[2] > 0:
+        day, duration, scale = birth_triggered
+        for b, level in enumerate(levels):
+            events.append({
+                "Event_Name": "%s %d births" % (event_name, b),
+                "class": "CampaignEvent",
+                "Start_Day": day,
+                "Event_Coordinator_Config": {
+                    "class": "StandardInterventionDistributionEventCoordinator",
+                    "Intervention_Config": {
+                        "class": "NodeLevelHealthTriggeredIV",
+                        "Demographic_Coverage": min(1.0, level * scale),
+                        "Trigger_Condition_List": ["Births"],
+                        "Duration": duration,
+                        "Actual_IndividualIntervention_Config": copy.deepcopy(intervention)
+                    }
+                },
+                "Nodeset_Config": {
+                    "class": "NodeSetNodeList",
+                    "Node_List": [int(n) for n in node_ids[index == b]]
+                }
+            })
+
+    logger.debug('%s: %d events for %d nodes', event_name, len(events), int((index >= 0).sum()))
+    return events
+
+
+def _dates_and_fracs(dates, fracs, birth_triggered=False):
+    """
+    Split household-site distribution dates and fractions into one-off distributions and an
+    optional birth-triggered final period.
+
+    With one more date than fractions (as in the household sites' ITN inputs), the last
+    fraction goes to newborns from the second-to-last date until the last one, or
+    indefinitely if the last date is not after it.
+
+    :return: (one-off dates, one-off fractions, (start day, duration, fraction) or None)
+    """
+    dates, fracs = list(dates), list(fracs)
+    if len(dates) == len(fracs):
+        return dates, fracs, None
+    if birth_triggered and len(dates) == len(fracs) + 1 and fracs:
+        duration = dates[-1] - dates[-2]
+        return dates[:-2], fracs[:-1], (dates[-2], duration if duration > 0 else -1, fracs[-1])
+    raise Exception('Got %d distribution dates for %d fractions' % (len(dates), len(fracs)))
+
+
+def add_bucketed_ITN(cb, coverage, channel, dates, fracs, n_buckets=20, waning={}):
+    """
+    Per-node ITN distributions from a household coverage table, with node coverage
+    quantized into n_buckets levels.
+
+    :param coverage: node-indexed coverage DataFrame (see household_inputs.coverage_table)
+    :param channel: coverage column, e.g. 'itn2012cov'
+    :param dates, fracs: distribution days and the fraction of each node's coverage given on each;
+        one extra date makes the last fraction a birth-triggered distribution (see _dates_and_fracs)
+    :param waning: overrides of the ITN waning configs, e.g. {'Usage_Config': {'Expected_Discard_Time': 270}}
+    """
+    config = copy.deepcopy(itn_config)
+    for key, value in waning.items():
+        config[key].update(value)
+    dates, fracs, births = _dates_and_fracs(dates, fracs, birth_triggered=True)
+    events = bucketed_node_events(coverage.index.values, coverage[channel].values, config, dates, fracs,
+                                  n_buckets, event_name='ITN %s' % channel, birth_triggered=births)
+    for event in events:
+        cb.add_event(event)
+    return len(events)
+
+
+def add_bucketed_node_IRS(cb, coverage, channel, dates, fracs, n_buckets=20, initial_killing=0.5, box_duration=90):
+    """
+    Per-node node-level IRS from a household coverage table, with spray coverage quantized
+    into n_buckets levels.
+    """
+    config = copy.deepcopy(node_irs_config)
+    config['Killing_Config']['Initial_Effect'] = initial_killing
+    config['Killing_Config']['Box_Duration'] = box_duration
+    dates, fracs, _ = _dates_and_fracs(dates, fracs)
+    events = bucketed_node_events(coverage.index.values, coverage[channel].values, config, dates, fracs,
+                                  n_buckets, coverage_key='Spray_Coverage', event_name='IRS %s' % channel)
+    for event in events:
+        cb.add_event(event)
+    return len(events)
+
+
+# Setup functions reading the coverage file once, on first use, for every intervention built from it.
+# Node coverage is exact unless n_buckets is given.
+
+def add_ITN_by_node_fn(coverage_fname, channel, dates, fracs, n_buckets=None, **kwargs):
+    return lambda cb: add_bucketed_ITN(cb, coverage_table(coverage_fname), channel, dates, fracs, n_buckets, **kwargs)
+
+
+def add_node_IRS_by_node_fn(coverage_fname, channel, dates, fracs, n_buckets=None, **kwargs):
+    return lambda cb: add_bucketed_node_IRS(cb, coverage_table(coverage_fname), channel, dates, fracs, n_buckets,
+                                            **kwargs)
+
@@ -74,18 +74,59 @@ def add_immunity_report(cb, start=0, interval=365, nreports=10000,
     cb.add_reports(immunity_report)
 
 
+def survey_report_windows(survey_days, reporting_interval=21, nreports=1):
+    """
+    Group survey days whose reporting windows follow on from each other.
+
+    Each survey covers nreports consecutive windows of reporting_interval days, so a survey
+    starting exactly where the previous one ends can be written by the same report object.
+
+    :return: list of (start_day, number of reports, survey days in the group)
+    """
+    span = reporting_interval * nreports
+    windows = []
+    for day in sorted(set(survey_days)):
+        if windows and windows[-1][2][-1] + span == day:
+            windows[-1][2].append(day)
+        else:
+            windows.append((day, None, [day]))
+    return [(start, nreports * len(days), days) for start, _, days in windows]
+
+
 def add_survey_report(cb, survey_days, reporting_interval=21,
                       trigger=["EveryUpdate"], nreports=1,
-                      nodes={"class": "NodeSetAll"}):
-    survey_reports = [BaseEventReportIntervalOutput(
-        event_trigger_list=trigger,
-        start_day=survey_day,
-        max_number_reports=nreports,
-        reporting_interval=reporting_interval,
-        report_description='Day_' + str(survey_day),
-        type="MalariaSurveyJSONAnalyzer",
-        nodeset_config=nodes) for survey_day in survey_days]
+                      nodes={"class": "NodeSetAll"}, consolidate=False):
+    """
+    Add MalariaSurveyJSONAnalyzer reports starting on each of the survey days.
+
+    By default there is one report object (and one output file) per survey day. With
+    consolidate=True, survey days whose windows are back to back share a single report with
+    one interval per survey, which reduces the number of reporters and output files.
+
+    :param consolidate: merge contiguous survey windows into a single report object
+    :return: dict of survey day to (report description, index of the first interval for that day)
+    """
+    if consolidate:
+        windows = survey_report_windows(survey_days, reporting_interval, nreports)
+    else:
+        windows = [(survey_day, nreports, [survey_day]) for survey_day in survey_days]
+
+    survey_reports = []
+    survey_index = {}
+    for start_day, n, days in windows:
+        description = 'Day_' + str(start_day) if len(days) == 1 else 'Days_%s_%s' % (days[0], days[-1])
+        survey_reports.append(BaseEventReportIntervalOutput(
+            event_trigger_list=trigger,
+            start_day=start_day,
+            max_number_reports=n,
+            reporting_interval=reporting_interval,
+            report_description=description,
+            type="MalariaSurveyJSONAnalyzer",
+            nodeset_config=nodes))
+        survey_index.update({day: (description, i * nreports) for i, day in enumerate(days)})
+
     cb.add_reports(*survey_reports)
+    return survey_index
 
 
 def add_patient_report(cb):
@@ -0,0 +1,155 @@
+import os
+import numpy as np
+
+# Binary spatial report layout: int32 node count, int32 time-step count, uint32 node IDs,
+# then float32 channel values ordered by time step, then node.
+header_dtype = np.int32
+node_id_dtype = np.uint32
+value_dtype = np.float32
+
+
+def spatial_report_filename(report_file_name, channel):
+    return '%s_%s.bin' % (report_file_name, channel)
+
+
+def read_spatial_header(filename):
+    """
+    Read the header of a binary spatial report.
+
+    :param filename: path to the channel .bin file
+    :return: (node_ids, data_offset) where data_offset is the byte offset of the first value
+    """
+    with open(filename, 'rb') as fin:
+        n_nodes, _ = np.fromfile(fin, dtype=header_dtype, count=2)
+        node_ids = np.fromfile(fin, dtype=node_id_dtype, count=n_nodes)
+    offset = 2 * np.dtype(header_dtype).itemsize + n_nodes * np.dtype(node_id_dtype).itemsize
+    return node_ids, offset
+
+
+class SpatialReportChannel(object):
+    """
+    Memory-mapped (time, node) view of one channel of a binary spatial report.
+
+    Nothing is read besides the header until values are indexed, and slicing by time returns
+    a view on the mapped file rather than a copy. The number of time steps is taken from the
+    file size, not from the header, so partially written reports can be opened too.
+    """
+
+    def __init__(self, filename, start_day=0, interval=1):
+        self.filename = filename
+        self.start_day = start_day
+        self.interval = interval
+
+        self.node_ids, self.offset = read_spatial_header(filename)
+        n_nodes = len(self.node_ids)
+        row_bytes = n_nodes * np.dtype(value_dtype).itemsize
+        n_tsteps = (os.path.getsize(filename) - self.offset) // row_bytes if n_nodes else 0
+
+        if n_tsteps > 0:
+            self.data = np.memmap(filename, dtype=value_dtype, mode='r', offset=self.offset,
+                                  shape=(n_tsteps, n_nodes))
+        else:
+            self.data = np.empty((0, n_nodes), dtype=value_dtype)
+
+        self._sorter = np.argsort(self.node_ids)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def times(self):
+        return self.start_day + self.interval * np.arange(self.data.shape[0])
+
+    def node_index(self, node_ids):
+        """
+        Column positions of the requested node IDs.
+
+        :param node_ids: a node ID or list of node IDs
+        :return: numpy array of column indices
+        """
+        node_ids = np.atleast_1d(np.asarray(node_ids, dtype=node_id_dtype))
+        pos = np.searchsorted(self.node_ids, node_ids, sorter=self._sorter)
+        pos = np.clip(pos, 0, len(self.node_ids) - 1)
+        idx = self._sorter[pos]
+        missing = self.node_ids[idx] != node_ids
+        if np.any(missing):
+            raise Exception('Node IDs not in spatial report %s: %s' % (self.filename, [int(n) for n in node_ids[missing]]))
+        return idx
+
+    def time_slice(self, start_day=None, end_day=None):
+        """
+        Row slice covering simulation days in [start_day, end_day).
+        """
+        start = 0 if start_day is None else int(np.ceil((start_day - self.start_day) / float(self.interval)))
+        stop = self.data.shape[0] if end_day is None else int(np.ceil((end_day - self.start_day) / float(self.interval)))
+        return slice(max(start, 0), max(stop, 0))
+
+    def select(self, nodes=None, start_day=None, end_day=None):
+        """
+        Values for a subset of nodes and days.
+
+        Only the selected columns are copied out of the mapped file; without nodes the
+        result is a view.
+
+        :param nodes: node IDs of interest; all nodes if None
+        :param start_day: first simulation day (inclusive)
+        :param end_day: last simulation day (exclusive)
+        :return: 2D array (time, node)
+        """
+        rows = self.data[self.time_slice(start_day, end_day)]
+        if nodes is None:
+            return rows
+        return rows[:, self.node_index(nodes)]
+
+    def __getitem__(self, item):
+        return self.data[item]
+
+
+class SpatialReportMalariaFilteredReader(object):
+    """
+    Reader for the per-channel binaries written by SpatialReportMalariaFiltered.
+
+    Channels are opened lazily and memory-mapped on first access:
+
+        reader = SpatialReportMalariaFilteredReader.from_report(report, 'output')
+        prevalence = reader['New_Diagnostic_Prevalence'].select(nodes=[12, 34], start_day=365*50)
+    """
+
+    def __init__(self, output_dir, channels=['Population'], start_day=0, interval=1, description='',
+                 report_file_name=None):
+        self.output_dir = output_dir
+        self.channels = list(channels)
+        self.start_day = start_day
+        self.interval = interval
+        self.report_file_name = report_file_name or 'SpatialReportMalariaFiltered' + description
+        self._channels = {}
+
+    @classmethod
+    def from_report(cls, report, output_dir):
+        """
+        Build a reader matching a :py:class:`FilteredMalariaSpatialReport` configuration.
+        """
+        return cls(output_dir, channels=report.channels, start_day=report.start_day,
+                   interval=report.interval, description=report.description)
+
+    def filename(self, channel):
+        return os.path.join(self.output_dir, spatial_report_filename(self.report_file_name, channel))
+
+    def channel(self, channel):
+        if channel not in self._channels:
+            if channel not in self.channels:
+                raise Exception('Channel %s not configured for %s' % (channel, self.report_file_name))
+            self._channels[channel] = SpatialReportChannel(self.filename(channel),
+                                                           start_day=self.start_day,
+                                                           interval=self.interval)
+        return self._channels[channel]
+
+    def __getitem__(self, channel):
+        return self.channel(channel)
+
+    def select(self, channels=None, nodes=None, start_day=None, end_day=None):
+        """
+        :return: dict of channel name to (time, node) array for the requested nodes and days
+        """
+        return {c: self.channel(c).select(nodes, start_day, end_day) for c in (channels or self.channels)}
@@ -0,0 +1,173 @@
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Rough on-disk cost of one value in the JSON reports (digits, separators and indentation)
+bytes_per_json_value = 20
+# SpatialReport binaries store float32 values
+bytes_per_binary_value = 4
+
+# Approximate number of channels written by each report, per bin or per time step
+summary_channels_by_age = 10
+summary_channels_by_age_and_density = 3
+summary_channels_by_time = 12
+immunity_channels_by_age = 6
+inset_chart_channels = 40
+filtered_report_channels = 40
+survey_fields_per_day = 8
+patient_fields_per_day = 10
+habitat_channels = 4
+
+
+def _n_reports(start, interval, nreports, duration):
+    if interval <= 0 or duration <= start:
+        return 0
+    return int(min(nreports, math.ceil((duration - start) / float(interval))))
+
+
+def _window_days(start, end, duration):
+    return max(0, min(end, duration) - start)
+
+
+def _summary_report_bytes(report, duration, population, n_nodes):
+    n_age = len(report.age_bins)
+    n_density = len(report.parasitemia_bins)
+    n_inf = len(report.infection_bins)
+    per_report = (summary_channels_by_time +
+                  summary_channels_by_age * n_age +
+                  summary_channels_by_age_and_density * n_density * n_age +
+                  n_inf * n_density * n_age)
+    n = _n_reports(report.start_day, report.reporting_interval, report.max_number_reports, duration)
+    return n * per_report * bytes_per_json_value
+
+
+def _immunity_report_bytes(report, duration, population, n_nodes):
+    per_report = immunity_channels_by_age * len(report.age_bins) * max(1, len(report.parasitemia_bins))
+    n = _n_reports(report.start_day, report.reporting_interval, report.max_number_reports, duration)
+    return n * per_report * bytes_per_json_value
+
+
+def _survey_report_bytes(report, duration, population, n_nodes):
+    n = _n_reports(report.start_day, report.reporting_interval, report.max_number_reports, duration)
+    return n * population * report.reporting_interval * survey_fields_per_day * bytes_per_json_value
+
+
+def _patient_report_bytes(report, duration, population, n_nodes):
+    return population * duration * patient_fields_per_day * bytes_per_json_value
+
+
+def _filtered_report_bytes(report, duration, population, n_nodes):
+    return _window_days(report.start_day, report.end_day, duration) * filtered_report_channels * bytes_per_json_value
+
+
+def _filtered_spatial_report_bytes(report, duration, population, n_nodes):
+    nodes = len(report.nodes) or n_nodes
+    n_steps = int(math.ceil(_window_days(report.start_day, report.end_day, duration) / float(report.interval)))
+    per_channel = 8 + nodes * bytes_per_binary_value + n_steps * nodes * bytes_per_binary_value
+    return len(report.channels) * per_channel
+
+
+def _event_counter_bytes(report, duration, population, n_nodes):
+    days = _window_days(report.start_day, report.start_day + report.duration_days, duration)
+    return days * len(report.event_trigger_list) * bytes_per_json_value
+
+
+def _habitat_report_bytes(report, duration, population, n_nodes):
+    return duration * habitat_channels * bytes_per_json_value
+
+
+# report type -> (estimator, number of files written)
+report_estimators = {
+    'MalariaSummaryReport': (_summary_report_bytes, lambda r: 1),
+    'MalariaImmunityReport': (_immunity_report_bytes, lambda r: 1),
+    'MalariaSurveyJSONAnalyzer': (_survey_report_bytes, lambda r: 1),
+    'MalariaPatientJSONReport': (_patient_report_bytes, lambda r: 1),
+    'ReportMalariaFiltered': (_filtered_report_bytes, lambda r: 1),
+    'SpatialReportMalariaFiltered': (_filtered_spatial_report_bytes, lambda r: len(r.channels)),
+    'ReportEventCounter': (_event_counter_bytes, lambda r: 1),
+    'VectorHabitatReport': (_habitat_report_bytes, lambda r: 1)
+}
+
+
+def _report_description(report):
+    for attr in ['report_description', 'description']:
+        if getattr(report, attr, ''):
+            return getattr(report, attr)
+    return ''
+
+
+def estimate_report_sizes(cb, population, n_nodes=1, duration=None):
+    """
+    Estimate the bytes written by each report attached to a config builder.
+
+    Includes the built-in InsetChart and spatial output when they are enabled in the config.
+    Reports of a type without an estimator are listed with a size of None.
+
+    :param cb: The :py:class:`DTKConfigBuilder <dtk.utils.core.DTKConfigBuilder>` holding the reports
+    :param population: expected number of simulated individuals
+    :param n_nodes: number of nodes in the simulation
+    :param duration: simulated days; defaults to the config Simulation_Duration
+    :return: list of dicts with type, description, bytes and files for each report
+    """
+    if duration is None:
+        duration = cb.get_param('Simulation_Duration')
+
+    sizes = []
+    for report in getattr(cb, 'custom_reports', []):
+        estimator, nfiles = report_estimators.get(report.type, (None, None))
+        if estimator is None:
+            logger.warning('No output-size estimate for report type %s', report.type)
+        sizes.append({'type': report.type,
+                      'description': _report_description(report),
+                      'bytes': estimator(report, duration, population, n_nodes) if estimator else None,
+                      'files': nfiles(report) if nfiles else 1})
+
+    if cb.get_param('Enable_Default_Reporting', 1):
+        sizes.append({'type': 'InsetChart', 'description': '',
+                      'bytes': duration * inset_chart_channels * bytes_per_json_value,
+                      'files': 1})
+
+    if cb.get_param('Enable_Spatial_Output', 0):
+        channels = cb.get_param('Spatial_Output_Channels', [])
+        sizes.append({'type': 'SpatialReport', 'description': '',
+                      'bytes': len(channels) * (8 + n_nodes * bytes_per_binary_value * (duration + 1)),
+                      'files': len(channels)})
+
+    return sizes
+
+
+def estimate_output_size(cb, population, n_nodes=1, duration=None, budget=None):
+    """
+    Summarize the estimated output of a simulation configuration.
+
+    :param budget: optional limit in bytes on the total output of one simulation
+    :return: dict with per-report sizes, total bytes and files, and whether the budget is exceeded
+    """
+    reports = estimate_report_sizes(cb, population, n_nodes, duration)
+    total = sum(r['bytes'] for r in reports if r['bytes'])
+    summary = {'reports': reports,
+               'total_bytes': total,
+               'total_files': sum(r['files'] for r in reports),
+               'over_budget': budget is not None and total > budget}
+
+    if summary['over_budget']:
+        largest = max(reports, key=lambda r: r['bytes'] or 0)
+        logger.warning('Estimated output of %.1f MB exceeds budget of %.1f MB (largest: %s %s, %.1f MB)',
+                       total / 1e6, budget / 1e6, largest['type'], largest['description'], largest['bytes'] / 1e6)
+
+    return summary
+
+
+def check_output_budget(cb, population, budget, n_nodes=1, duration=None):
+    """
+    Raise before submission if the estimated output of a simulation exceeds the budget.
+
+    :param budget: limit in bytes on the total output of one simulation
+    :return: the summary from :any:`estimate_output_size`
+    """
+    summary = estimate_output_size(cb, population, n_nodes, duration, budget)
+    if summary['over_budget']:
+        raise Exception('Estimated report output of %d bytes exceeds the budget of %d bytes'
+                        % (summary['total_bytes'], budget))
+    return summary
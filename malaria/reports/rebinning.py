@@ -0,0 +1,147 @@
+import numpy as np
+
+population_channel = 'Average Population by Age Bin'
+
+
+def bin_intervals(upper_edges, lower=0):
+    """
+    (lower, upper] intervals for bins given by their upper edges, as used in the report configs.
+    """
+    upper = np.asarray(upper_edges, dtype=float)
+    lower = np.concatenate(([lower], upper[:-1]))
+    return lower, upper
+
+
+def rebin_weights(fine_edges, coarse_edges, scale='linear', open_ended=True):
+    """
+    Matrix mapping fine bins onto coarse bins.
+
+    Entry [i, j] is the fraction of fine bin i that falls in coarse bin j, assuming values are
+    spread uniformly across each fine bin (in log space with scale='log'). Nested edges give a
+    0/1 matrix; otherwise fine bins straddling a coarse edge are split proportionally. Fine bins
+    of infinite width are assigned whole to the coarse bin holding their finite edge.
+
+    :param fine_edges: upper edges of the fine bins
+    :param coarse_edges: upper edges of the coarse bins
+    :param scale: 'linear' or 'log' spacing assumed within a bin
+    :param open_ended: assign anything above the last coarse edge to the last coarse bin
+    :return: 2D array (fine bins, coarse bins)
+    """
+    lo, hi = bin_intervals(fine_edges)
+    clo, chi = bin_intervals(coarse_edges)
+    if open_ended:
+        chi[-1] = np.inf
+
+    if scale == 'log':
+        with np.errstate(divide='ignore'):
+            lo, hi, clo, chi = [np.log(x) for x in (lo, hi, clo, chi)]
+    elif scale != 'linear':
+        raise Exception('Unknown re-binning scale: %s' % scale)
+
+    lo, hi = lo[:, None], hi[:, None]
+    clo, chi = clo[None, :], chi[None, :]
+
+    with np.errstate(invalid='ignore'):
+        width = hi - lo
+        finite = np.isfinite(width)[:, 0]
+        overlap = np.clip(np.minimum(hi, chi) - np.maximum(lo, clo), 0, None)
+        weights = np.where(finite[:, None], overlap / np.where(width > 0, width, 1), 0)
+
+    # Zero-width and infinite-width bins go whole to the coarse bin containing a finite edge
+    for i in np.where(~finite | (width[:, 0] <= 0))[0]:
+        edge = lo[i, 0] if np.isfinite(lo[i, 0]) else hi[i, 0]
+        j = min(np.searchsorted(chi[0], edge), chi.shape[1] - 1)
+        weights[i, :] = 0
+        weights[i, j] = 1
+
+    return weights
+
+
+def rebin(values, fine_edges, coarse_edges, axis=-1, weights=None, **kwargs):
+    """
+    Re-bin counts along one axis of an array.
+
+    :param values: array of counts with the fine bins along axis
+    :param weights: optional precomputed :any:`rebin_weights` matrix
+    :return: array with the coarse bins along axis
+    """
+    if weights is None:
+        weights = rebin_weights(fine_edges, coarse_edges, **kwargs)
+    values = np.moveaxis(np.asarray(values, dtype=float), axis, -1)
+    return np.moveaxis(values.dot(weights), -1, axis)
+
+
+def rebin_rates(rates, population, fine_edges, coarse_edges, axis=-1, weights=None, **kwargs):
+    """
+    Re-bin per-capita quantities (prevalence, incidence rates) weighting by population.
+
+    :param rates: array of rates with the fine bins along axis
+    :param population: population per fine bin, broadcastable against rates
+    :return: population-weighted rates in the coarse bins
+    """
+    if weights is None:
+        weights = rebin_weights(fine_edges, coarse_edges, **kwargs)
+    population = np.broadcast_to(np.asarray(population, dtype=float), np.shape(rates))
+    numerator = rebin(np.asarray(rates, dtype=float) * population, None, None, axis, weights)
+    denominator = rebin(population, None, None, axis, weights)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denominator > 0, numerator / denominator, 0)
+
+
+def rebin_summary_report(data, age_bins=None, parasitemia_bins=None, age_scale='linear', parasitemia_scale='log'):
+    """
+    Re-bin a parsed MalariaSummaryReport onto coarser age and/or parasitemia bins.
+
+    Population channels are summed, every other age-binned channel is treated as a per-capita
+    quantity and weighted by the population of each age bin. The fine bins are taken from the
+    report Metadata.
+
+    :param data: parsed MalariaSummaryReport JSON
+    :param age_bins: coarse age bin upper edges; None keeps the report age bins
+    :param parasitemia_bins: coarse parasitemia bin upper edges; None keeps the report bins
+    :return: a new report dict with the same structure and updated Metadata
+    """
+    metadata = dict(data['Metadata'])
+    fine_ages = metadata['Age Bins']
+    fine_densities = metadata['Parasitemia Bins']
+
+    age_w = rebin_weights(fine_ages, age_bins, scale=age_scale) if age_bins is not None else None
+    density_w = rebin_weights(fine_densities, parasitemia_bins, scale=parasitemia_scale) \
+        if parasitemia_bins is not None else None
+
+    by_age = data['DataByTimeAndAgeBins']
+    population = np.asarray(by_age[population_channel], dtype=float)  # (time, age)
+
+    out = dict(data)
+    out['Metadata'] = metadata
+
+    coarse_by_age = {}
+    for channel, values in by_age.items():
+        values = np.asarray(values, dtype=float)
+        if age_w is None:
+            coarse_by_age[channel] = values.tolist()
+        elif 'Population' in channel:
+            coarse_by_age[channel] = rebin(values, None, None, -1, age_w).tolist()
+        else:
+            coarse_by_age[channel] = rebin_rates(values, population, None, None, -1, age_w).tolist()
+    out['DataByTimeAndAgeBins'] = coarse_by_age
+
+    for key in ['DataByTimeAndPfPRBinsTotalPopulation', 'DataByTimeAndInfectiousnessBinsTotalPopulation']:
+        if key not in data:
+            continue
+        coarse = {}
+        for channel, values in data[key].items():
+            values = np.asarray(values, dtype=float)  # (time, density, age)
+            if density_w is not None and key == 'DataByTimeAndPfPRBinsTotalPopulation':
+                values = rebin(values, None, None, 1, density_w)
+            if age_w is not None:
+                values = rebin_rates(values, population[:, None, :], None, None, -1, age_w)
+            coarse[channel] = values.tolist()
+        out[key] = coarse
+
+    if age_bins is not None:
+        metadata['Age Bins'] = list(age_bins)
+    if parasitemia_bins is not None:
+        metadata['Parasitemia Bins'] = list(parasitemia_bins)
+
+    return out
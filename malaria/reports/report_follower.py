@@ -0,0 +1,131 @@
+import os
+import time
+import numpy as np
+
+from malaria.reports.SpatialReportReader import read_spatial_header, header_dtype, node_id_dtype, value_dtype
+
+
+class RunningAggregate(object):
+    """
+    Running per-node totals over the time steps seen so far.
+    """
+
+    def __init__(self, n_nodes):
+        self.n_tsteps = 0
+        self.sum = np.zeros(n_nodes)
+        self.min = np.full(n_nodes, np.inf)
+        self.max = np.full(n_nodes, -np.inf)
+        self.last = np.full(n_nodes, np.nan)
+
+    def update(self, rows):
+        if len(rows) == 0:
+            return
+        self.n_tsteps += len(rows)
+        self.sum += rows.sum(axis=0)
+        self.min = np.minimum(self.min, rows.min(axis=0))
+        self.max = np.maximum(self.max, rows.max(axis=0))
+        self.last = np.array(rows[-1], dtype=float)
+
+    @property
+    def mean(self):
+        return self.sum / self.n_tsteps if self.n_tsteps else np.full(len(self.sum), np.nan)
+
+
+class SpatialReportFollower(object):
+    """
+    Incrementally read a binary spatial report while EMOD is still appending to it.
+
+    Each call to :py:meth:`read_new` parses only the complete time steps written since the
+    previous call; a partially written last row is left for the next poll.
+    """
+
+    def __init__(self, filename, start_day=0, interval=1):
+        self.filename = filename
+        self.start_day = start_day
+        self.interval = interval
+        self.node_ids = None
+        self.position = None
+        self.n_tsteps = 0
+        self.aggregate = None
+
+    def _open_header(self):
+        header_bytes = 2 * np.dtype(header_dtype).itemsize
+        if not os.path.exists(self.filename) or os.path.getsize(self.filename) < header_bytes:
+            return False
+        with open(self.filename, 'rb') as fin:
+            n_nodes = np.fromfile(fin, dtype=header_dtype, count=1)[0]
+        if os.path.getsize(self.filename) < header_bytes + n_nodes * np.dtype(node_id_dtype).itemsize:
+            return False
+        self.node_ids, self.position = read_spatial_header(self.filename)
+        self.aggregate = RunningAggregate(len(self.node_ids))
+        return True
+
+    def read_new(self):
+        """
+        :return: (times, rows) for the time steps appended since the last call; rows is (time, node)
+        """
+        if self.node_ids is None and not self._open_header():
+            return np.empty(0), np.empty((0, 0), dtype=value_dtype)
+
+        row_bytes = len(self.node_ids) * np.dtype(value_dtype).itemsize
+        n_new = (os.path.getsize(self.filename) - self.position) // row_bytes if row_bytes else 0
+        if n_new <= 0:
+            return np.empty(0), np.empty((0, len(self.node_ids)), dtype=value_dtype)
+
+        with open(self.filename, 'rb') as fin:
+            fin.seek(self.position)
+            rows = np.fromfile(fin, dtype=value_dtype, count=n_new * len(self.node_ids))
+        rows = rows.reshape(n_new, len(self.node_ids))
+
+        times = self.start_day + self.interval * np.arange(self.n_tsteps, self.n_tsteps + n_new)
+        self.position += n_new * row_bytes
+        self.n_tsteps += n_new
+        self.aggregate.update(rows)
+        return times, rows
+
+
+def follow_report(followers, poll_interval=30, timeout=None, is_finished=None):
+    """
+    Generator over newly appended intervals of one or more report channels.
+
+    Iteration ends once is_finished() returns True and a final poll has been read, or after
+    timeout seconds without new data.
+
+    :param followers: dict of channel name to :py:class:`SpatialReportFollower`
+    :param poll_interval: seconds to wait between polls when no new data arrived
+    :param timeout: seconds without new data after which to stop; None to wait indefinitely
+    :param is_finished: optional callable returning True when the simulation has completed
+    :return: yields dicts of channel name to (times, rows, RunningAggregate) for channels with new data
+    """
+    last_data = time.time()
+    while True:
+        finished = is_finished() if is_finished else False
+        new = {}
+        for channel, follower in followers.items():
+            times, rows = follower.read_new()
+            if len(times):
+                new[channel] = (times, rows, follower.aggregate)
+
+        if new:
+            last_data = time.time()
+            yield new
+        if finished:
+            return
+        if timeout is not None and time.time() - last_data > timeout:
+            return
+        if not new:
+            time.sleep(poll_interval)
+
+
+def watch_report(followers, callback, **kwargs):
+    """
+    Call callback(channel, times, rows, aggregate) for every newly appended interval.
+
+    The callback may return True to stop following, e.g. to reject a run early.
+    Keyword arguments are passed to :any:`follow_report`.
+    """
+    for new in follow_report(followers, **kwargs):
+        for channel, (times, rows, aggregate) in new.items():
+            if callback(channel, times, rows, aggregate):
+                return channel
+    return None
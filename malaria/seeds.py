@@ -0,0 +1,75 @@
+import logging
+
+import numpy as np
+from scipy.stats import norm
+
+logger = logging.getLogger(__name__)
+
+max_run_number = 2 ** 31 - 1
+
+
+def run_numbers(n_replicates, stream=0):
+    """
+    Reproducible Run_Number seeds for n_replicates. The same stream always yields the same
+    seeds, so every scenario drawing from it gets matched replicates.
+    """
+    rng = np.random.RandomState(stream)
+    seeds = []
+    while len(seeds) < n_replicates:
+        seed = int(rng.randint(max_run_number))
+        if seed not in seeds:
+            seeds.append(seed)
+    return seeds
+
+
+def run_number_fn(run_number):
+    return lambda cb: cb.update_params({'Run_Number': run_number})
+
+
+def paired_scenarios(scenarios, n_replicates, stream=0):
+    """
+    Common-random-numbers sweep: every scenario is run with the same Run_Number list, so
+    replicate i of each scenario shares its seed and the scenarios can be compared pairwise.
+
+    :param scenarios: dict of scenario name to a setup function (cb) -> None, e.g.
+        lambda cb: add_drug_campaign(cb, 'MDA', 'DP', start_days=[...])
+    :return: list of (scenario name, replicate index, run number, [setup functions]) to
+        build the simulations from
+    """
+    seeds = run_numbers(n_replicates, stream)
+    return [(name, i, seed, [fn, run_number_fn(seed)])
+            for name, fn in scenarios.items() for i, seed in enumerate(seeds)]
+
+
+def variance_reduction(outcome_a, outcome_b, confidence=0.95, half_width=None):
+    """
+    Compare a paired (common seeds) estimate of the scenario difference with independent runs.
+
+    :param outcome_a, outcome_b: outcomes per replicate, ordered by replicate so entry i of
+        both scenarios used the same Run_Number
+    :param half_width: optional target confidence interval half width on the mean difference,
+        to report the replicates needed with and without pairing
+    :return: dict with the mean difference, its paired and independent variances, their ratio
+        and the correlation between scenarios
+    """
+    a = np.asarray(outcome_a, dtype=float)
+    b = np.asarray(outcome_b, dtype=float)
+    if a.shape != b.shape or len(a) < 2:
+        raise Exception('Paired outcomes need matching replicates (at least 2), got %s and %s' % (a.shape, b.shape))
+
+    paired = (a - b).var(ddof=1)
+    independent = a.var(ddof=1) + b.var(ddof=1)
+    result = {
+        'mean_difference': (a - b).mean(),
+        'paired_variance': paired,
+        'independent_variance': independent,
+        'variance_reduction': independent / paired if paired > 0 else np.inf,
+        'correlation': np.corrcoef(a, b)[0, 1] if a.std() > 0 and b.std() > 0 else np.nan
+    }
+    if half_width is not None:
+        z = norm.ppf(0.5 + confidence / 2.0)
+        result['replicates_paired'] = int(np.ceil(paired * (z / half_width) ** 2))
+        result['replicates_independent'] = int(np.ceil(independent * (z / half_width) ** 2))
+    logger.info('Common random numbers: variance of the difference reduced %.2fx (correlation %.2f)',
+                result['variance_reduction'], result['correlation'])
+    return result
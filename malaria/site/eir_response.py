@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+from malaria.site.input_EIR_by_site import site_monthly_EIRs, mAb_vs_EIR
+
+logger = logging.getLogger(__name__)
+
+response_channels = ['PfPR by Age Bin', 'Annual Clinical Incidence by Age Bin']
+
+
+def summary_report_response(data, channels=response_channels, last_intervals=None):
+    """
+    Age profile of each channel of a MalariaSummaryReport, averaged over its reporting
+    intervals (or only the last_intervals of them, e.g. the final year of a birth cohort).
+
+    :return: (age bins, {channel: per age bin values})
+    """
+    by_age = data['DataByTimeAndAgeBins']
+    response = {}
+    for channel in channels:
+        values = np.asarray(by_age[channel], dtype=float)
+        if last_intervals:
+            values = values[-last_intervals:]
+        response[channel] = values.mean(axis=0).tolist()
+    return list(data['Metadata']['Age Bins']), response
+
+
+class EIRResponseSurface(object):
+    """
+    Lookup of expected PfPR and clinical incidence by age as a function of annual EIR,
+    built from archived input-EIR simulations (:py:func:`configure_site_EIR`).
+
+    Runs are grouped by seasonal profile (study site and circular shift) and maternal
+    antibody protection; within a group the outputs are interpolated in log annual EIR.
+    Runs can be added as they land and the surface saved and reloaded.
+
+        surface = EIRResponseSurface.load('eir_surface.json')
+        surface.add_run(sim_id, report_dict, 'Namawala', habitat=0.5)
+        surface.save('eir_surface.json')
+        surface.query('Namawala', 100, channel='PfPR by Age Bin')
+    """
+
+    def __init__(self, runs=None):
+        self.runs = runs or {}
+        self._groups = None
+
+    @staticmethod
+    def group_key(site, circular_shift=0, maternal_protection=None):
+        return '%s|%d|%s' % (site, circular_shift % 12, maternal_protection)
+
+    def add_run(self, sim_id, summary_report, site, habitat=1, circular_shift=0, maternal_protection=None,
+                last_intervals=None):
+        """
+        Add one simulation's summary report. Runs already in the surface are skipped.
+
+        :param summary_report: parsed MalariaSummaryReport dict
+        :param maternal_protection: the Maternal_Antibody_Protection the run was configured
+            with before the mAb_vs_EIR downscaling, if it varies between runs
+        """
+        if sim_id in self.runs:
+            return False
+        annual_EIR = sum(site_monthly_EIRs(site, habitat, circular_shift))
+        age_bins, response = summary_report_response(summary_report, last_intervals=last_intervals)
+        self.runs[sim_id] = {
+            'group': self.group_key(site, circular_shift, maternal_protection),
+            'annual_EIR': annual_EIR,
+            'mAb': mAb_vs_EIR(annual_EIR),
+            'age_bins': age_bins,
+            'response': response
+        }
+        self._groups = None
+        return True
+
+    def harvest(self, simulations, **kwargs):
+        """
+        Add runs from (sim_id, summary report path, tags) tuples, where tags hold the
+        configure_site_EIR arguments (site, habitat, circular_shift).
+
+        :return: number of new runs added
+        """
+        added = 0
+        for sim_id, path, tags in simulations:
+            if sim_id in self.runs or not os.path.exists(path):
+                continue
+            with open(path) as fin:
+                report = json.load(fin)
+            added += self.add_run(sim_id, report, tags['site'], tags.get('habitat', 1),
+                                  tags.get('circular_shift', 0), tags.get('maternal_protection'), **kwargs)
+        logger.info('EIR response surface: %d new runs, %d total', added, len(self.runs))
+        return added
+
+    @property
+    def groups(self):
+        if self._groups is None:
+            groups = {}
+            for run in self.runs.values():
+                groups.setdefault(run['group'], []).append(run)
+            self._groups = {}
+            for key, runs in groups.items():
+                log_EIR = np.log10([r['annual_EIR'] for r in runs])
+                order = np.argsort(log_EIR)
+                self._groups[key] = (log_EIR[order], [runs[i] for i in order])
+        return self._groups
+
+    def query(self, site, annual_EIR, channel='PfPR by Age Bin', circular_shift=0, maternal_protection=None):
+        """
+        :return: (age bins, interpolated values by age bin) at annual_EIR; replicate runs at
+            the same EIR are averaged, and EIRs outside the harvested range are clamped
+        """
+        key = self.group_key(site, circular_shift, maternal_protection)
+        if key not in self.groups:
+            raise Exception('No runs for site %s with circular shift %d' % (site, circular_shift))
+        log_EIR, runs = self.groups[key]
+
+        grid, inverse = np.unique(log_EIR, return_inverse=True)
+        values = np.array([r['response'][channel] for r in runs])
+        mean = np.array([values[inverse == i].mean(axis=0) for i in range(len(grid))])
+
+        x = np.log10(annual_EIR)
+        if x < grid[0] or x > grid[-1]:
+            logger.warning('Annual EIR %g outside harvested range [%g, %g]: clamping', annual_EIR,
+                           10 ** grid[0], 10 ** grid[-1])
+        interpolated = [float(np.interp(x, grid, mean[:, j])) for j in range(mean.shape[1])]
+        return runs[0]['age_bins'], interpolated
+
+    def save(self, path):
+        with open(path, 'w') as fout:
+            json.dump(self.runs, fout)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as fin:
+            return cls(json.load(fin))
@@ -1,4 +1,6 @@
-from collections import deque
+import copy
+from functools import lru_cache
+import numpy as np
 from dtk.generic.geography import set_geography
 from dtk.vector.study_sites import geography_from_site
 from dtk.interventions.input_EIR import add_InputEIR
@@ -24,6 +26,49 @@ study_site_monthly_EIRs = {
     }
 
 
+days_in_month = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+monthly_EIR_profiles = {site: np.array(EIRs, dtype=float) for site, EIRs in study_site_monthly_EIRs.items()}
+
+
+@lru_cache(maxsize=None)
+def site_monthly_EIRs(site, habitat=1, circular_shift=0):
+    """
+    Monthly EIRs of a study site scaled by habitat and rotated forward by circular_shift
+    months. Results are cached and shared, so treat them as read-only.
+    """
+    if site not in monthly_EIR_profiles:
+        raise Exception("Don't know how to configure site: %s " % site)
+    return tuple(np.roll(habitat * monthly_EIR_profiles[site], circular_shift).tolist())
+
+
+def site_daily_EIRs(site, habitat=1, circular_shift=0):
+    """
+    365 daily EIRs of a study site: each value of site_monthly_EIRs spread evenly over the
+    days of its month, so day and month boundaries line up for any circular_shift.
+    """
+    return np.repeat(np.array(site_monthly_EIRs(site, habitat, circular_shift)) / days_in_month, days_in_month)
+
+
+class _EventRecorder(object):
+    def __init__(self):
+        self.events = []
+
+    def add_event(self, event):
+        self.events.append(event)
+
+
+@lru_cache(maxsize=None)
+def site_InputEIR_events(site, habitat=1, circular_shift=0):
+    """
+    Campaign events add_InputEIR builds for a study site, built once per (site, habitat,
+    circular_shift) and shared; copy them before adding them to a config builder.
+    """
+    recorder = _EventRecorder()
+    add_InputEIR(recorder, monthlyEIRs=list(site_monthly_EIRs(site, habitat, circular_shift)))
+    return tuple(recorder.events)
+
+
 def mAb_vs_EIR(EIR):
     # Rough cut at function from eyeballing a few BinnedReport outputs parsed into antibody fractions
     mAb = 0.9 * (1e-4*EIR*EIR + 0.7*EIR) / ( 0.7*EIR + 2 )
@@ -33,15 +78,12 @@ def mAb_vs_EIR(EIR):
 # Configuration of study-site input EIR
 def configure_site_EIR(cb, site, habitat=1, circular_shift=0, birth_cohort=True, set_site_geography=True, **geo_kwargs):
 
-    if site not in study_site_monthly_EIRs.keys():
-        raise Exception("Don't know how to configure site: %s " % site)
-
-    EIRs = [habitat * m for m in study_site_monthly_EIRs[site]]
+    monthlyEIRs = list(site_monthly_EIRs(site, habitat, circular_shift))
 
     # Calibration is done with CONSTANT_INITIAL_IMMUNITY on birth cohort
     # but with a downscaling to account for maternal immunity levels
     # Here, we'll keep the CONSTANT model and downscale as a function of annual EIR
-    annual_EIR = sum(EIRs)
+    annual_EIR = sum(monthlyEIRs)
     mAb = cb.get_param('Maternal_Antibody_Protection') * mAb_vs_EIR(annual_EIR)
 
     if birth_cohort:
@@ -55,10 +97,7 @@ def configure_site_EIR(cb, site, habitat=1, circular_shift=0, birth_cohort=True,
                        'Maternal_Antibody_Protection': mAb
                        })
 
-    # Shift order of months according to circular_shift argument
-    EIR_deque = deque(EIRs)
-    EIR_deque.rotate(circular_shift)
-    monthlyEIRs=list(EIR_deque)
-    add_InputEIR(cb, monthlyEIRs=monthlyEIRs)
+    for event in site_InputEIR_events(site, habitat, circular_shift):
+        cb.add_event(copy.deepcopy(event))
 
     return {'monthlyEIRs':monthlyEIRs}
\ No newline at end of file
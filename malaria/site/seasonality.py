@@ -0,0 +1,171 @@
+import itertools
+
+import numpy as np
+
+month_edges = np.cumsum([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]) / 365.0
+
+# Twelve monthly values determine up to six harmonics; fewer smooth the peaks of sharply
+# seasonal sites (two harmonics miss Dapelogo's months by up to a quarter of the peak)
+default_harmonics = 6
+
+
+def _basis(t, n_harmonics):
+    # Columns 1, cos(2 pi k t), sin(2 pi k t) for k = 1..n_harmonics, t in years
+    t = np.asarray(t, dtype=float)[..., None]
+    k = np.arange(1, n_harmonics + 1)
+    columns = [np.ones(t.shape)]
+    for c, s in zip(np.cos(2 * np.pi * k * t).T, np.sin(2 * np.pi * k * t).T):
+        columns += [c[..., None], s[..., None]]
+    return np.concatenate(columns, axis=-1)
+
+
+def _interval_basis(start, end, n_harmonics):
+    # Basis averaged over [start, end), so fits respect that monthly values are month means
+    start, end = np.asarray(start, dtype=float), np.asarray(end, dtype=float)
+    width = (end - start)[:, None]
+    k = np.arange(1, n_harmonics + 1)
+    w = 2 * np.pi * k
+    cos_mean = (np.sin(w * end[:, None]) - np.sin(w * start[:, None])) / (w * width)
+    sin_mean = (np.cos(w * start[:, None]) - np.cos(w * end[:, None])) / (w * width)
+    columns = [np.ones(width.shape)]
+    for j in range(n_harmonics):
+        columns += [cos_mean[:, j:j + 1], sin_mean[:, j:j + 1]]
+    return np.concatenate(columns, axis=1)
+
+
+def n_harmonics(coefficients):
+    return (np.shape(coefficients)[-1] - 1) // 2
+
+
+def _floor_preserving_total(values, floor):
+    # Clip at floor, then rescale so each profile keeps its unclipped total over the year
+    if floor is None:
+        return values
+    total = values.sum(axis=-1, keepdims=True)
+    clipped = np.maximum(values, floor)
+    clipped_total = clipped.sum(axis=-1, keepdims=True)
+    return clipped * np.where(clipped_total > 0, total / np.where(clipped_total > 0, clipped_total, 1), 1)
+
+
+def fit_fourier(values, n_harmonics=default_harmonics, times=None):
+    """
+    Least-squares Fourier series of a yearly profile.
+
+    :param values: 12 monthly values (month means), or values at the given times
+    :param times: sample times in days of year; None for a 12-month profile
+    :return: coefficient array [mean, cos1, sin1, cos2, sin2, ...] in the units of values
+    """
+    values = np.asarray(values, dtype=float)
+    if times is None:
+        X = _interval_basis(month_edges[:-1], month_edges[1:], n_harmonics)
+    else:
+        X = _basis(np.asarray(times, dtype=float) / 365.0, n_harmonics)
+    return np.linalg.lstsq(X, values, rcond=None)[0]
+
+
+def evaluate(coefficients, days, floor=0.0):
+    """
+    Evaluate one or many fitted profiles at days of year, vectorized.
+
+    :param coefficients: (..., 2 * harmonics + 1) coefficient array(s)
+    :param days: array of days (taken modulo 365)
+    :param floor: lower bound on the result (profiles such as EIR cannot be negative)
+    :return: array of shape coefficients.shape[:-1] + days.shape
+    """
+    coefficients = np.asarray(coefficients, dtype=float)
+    X = _basis(np.mod(days, 365) / 365.0, n_harmonics(coefficients))
+    values = np.tensordot(coefficients, X, axes=([-1], [-1]))
+    return values if floor is None else np.maximum(values, floor)
+
+
+def monthly(coefficients, floor=0.0):
+    """
+    Month means of one or many profiles, as used by InputEIR. Months below floor are
+    raised to it and the profile rescaled, so the annual total is kept.
+    """
+    coefficients = np.asarray(coefficients, dtype=float)
+    X = _interval_basis(month_edges[:-1], month_edges[1:], n_harmonics(coefficients))
+    return _floor_preserving_total(np.tensordot(coefficients, X, axes=([-1], [-1])), floor)
+
+
+def daily(coefficients, floor=0.0):
+    """
+    365 daily values of one or many profiles, floored like :py:func:`monthly`.
+    """
+    return _floor_preserving_total(evaluate(coefficients, np.arange(365) + 0.5, floor=None), floor)
+
+
+def shift(coefficients, days):
+    """
+    Delay profile(s) by a number of days as a phase rotation of the harmonics.
+    """
+    coefficients = np.array(coefficients, dtype=float)
+    for k in range(1, n_harmonics(coefficients) + 1):
+        phase = 2 * np.pi * k * days / 365.0
+        a, b = coefficients[..., 2 * k - 1].copy(), coefficients[..., 2 * k].copy()
+        coefficients[..., 2 * k - 1] = a * np.cos(phase) - b * np.sin(phase)
+        coefficients[..., 2 * k] = a * np.sin(phase) + b * np.cos(phase)
+    return coefficients
+
+
+def scale_to_annual(coefficients, annual_total):
+    """
+    Rescale monthly-valued profile(s) so the 12 month values sum to annual_total.
+    """
+    coefficients = np.asarray(coefficients, dtype=float)
+    total = monthly(coefficients, floor=None).sum(axis=-1)
+    return coefficients * (np.asarray(annual_total, dtype=float) / total)[..., None]
+
+
+def fit_study_site_EIRs(n_harmonics=default_harmonics, sites=None):
+    """
+    Fourier fits of the study-site monthly EIR profiles.
+
+    :return: (site names, (sites, 2 * harmonics + 1) coefficient array)
+    """
+    from malaria.site.input_EIR_by_site import study_site_monthly_EIRs
+
+    sites = sites or [s for s in study_site_monthly_EIRs if not s.startswith('_')]
+    return sites, np.array([fit_fourier(study_site_monthly_EIRs[s], n_harmonics) for s in sites])
+
+
+def fit_linear_spline(spline, n_harmonics=default_harmonics):
+    """
+    Fourier fit of a LINEAR_SPLINE larval habitat, e.g. the funestus habitats of the
+    Munyumbwe and Luumbo household sites.
+
+    :param spline: the LINEAR_SPLINE dict (with Capacity_Distribution_Per_Year)
+    :return: (coefficients, Max_Larval_Capacity)
+    """
+    distribution = spline['Capacity_Distribution_Per_Year']
+    return fit_fourier(distribution['Values'], n_harmonics, distribution['Times']), spline.get('Max_Larval_Capacity')
+
+
+def linear_spline(coefficients, max_larval_capacity, n_points=12):
+    """
+    LINEAR_SPLINE habitat dict sampled from a profile at n_points evenly spaced times,
+    normalized to a peak of 1 with Max_Larval_Capacity scaled to match, so peak habitat is kept.
+    """
+    times = np.arange(n_points) * 365.0 / n_points
+    values = evaluate(coefficients, times)
+    return {
+        'Capacity_Distribution_Per_Year': {
+            'Times': np.round(times, 3).tolist(),
+            'Values': (values / values.max()).tolist()
+        },
+        'Max_Larval_Capacity': max_larval_capacity * values.max()
+    }
+
+
+def seasonal_sweep(annual_totals, amplitudes, peak_days):
+    """
+    Single-harmonic seasonality profiles for every combination of annual total, relative
+    amplitude (0 = flat, 1 = zero at the trough) and day of peak.
+
+    :return: (combinations, 3) parameter array and matching (combinations, 3) coefficient array
+    """
+    params = np.array(list(itertools.product(annual_totals, amplitudes, peak_days)), dtype=float)
+    mean = params[:, 0] / 12.0
+    phase = 2 * np.pi * params[:, 2] / 365.0
+    coefficients = np.stack([mean, mean * params[:, 1] * np.cos(phase), mean * params[:, 1] * np.sin(phase)], axis=1)
+    return params, scale_to_annual(coefficients, params[:, 0])
@@ -0,0 +1,136 @@
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+logger = logging.getLogger(__name__)
+
+earth_radius_km = 6371.0
+
+
+def _unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def _chord(radius_km):
+    # Straight-line distance between unit-sphere points a great-circle distance radius_km apart,
+    # so Euclidean queries on the tree are exact haversine queries
+    return 2 * np.sin(np.minimum(np.asarray(radius_km, dtype=float) / earth_radius_km, np.pi) / 2)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * earth_radius_km * np.arcsin(np.sqrt(a))
+
+
+def broadcast_radius(event_config):
+    """
+    Max_Distance_To_Other_Nodes_Km of a BroadcastEventToOtherNodes config, e.g. from fmda_cfg.
+    """
+    return event_config.get('Max_Distance_To_Other_Nodes_Km', 0)
+
+
+class NodeSpatialIndex(object):
+    """
+    KD-tree over node coordinates answering great-circle radius queries, for planning the
+    reach of focal responses (fmda_cfg, add_reactive_node_IRS) in household-as-node
+    geographies before running anything.
+
+        index = NodeSpatialIndex.from_demographics('Munyumbwe_households_all_demographics.json')
+        index.radius_summary([0, 0.05, 0.1, 0.2])
+        index.expected_broadcasts(broadcast_radius(fmda_cfg(0.1)))
+    """
+
+    def __init__(self, node_ids, latitudes, longitudes, population=None):
+        self.node_ids = np.asarray(node_ids)
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        self.population = np.ones(len(self.node_ids)) if population is None else np.asarray(population, dtype=float)
+        self.tree = cKDTree(_unit_vectors(self.latitudes, self.longitudes))
+        self._position = {n: i for i, n in enumerate(self.node_ids.tolist())}
+
+    @classmethod
+    def from_demographics(cls, demographics):
+        """
+        :param demographics: demographics file path or parsed dict with a Nodes list
+        """
+        if not isinstance(demographics, dict):
+            with open(demographics) as fin:
+                demographics = json.load(fin)
+        nodes = demographics['Nodes']
+        return cls([n['NodeID'] for n in nodes],
+                   [n['NodeAttributes']['Latitude'] for n in nodes],
+                   [n['NodeAttributes']['Longitude'] for n in nodes],
+                   [n['NodeAttributes'].get('InitialPopulation', 1) for n in nodes])
+
+    def positions(self, node_ids=None):
+        if node_ids is None:
+            return np.arange(len(self.node_ids))
+        return np.array([self._position[n] for n in node_ids])
+
+    def neighbors(self, radius_km, node_ids=None, include_self=True):
+        """
+        :return: dict of node id to the ids of nodes within radius_km of it
+        """
+        positions = self.positions(node_ids)
+        points = self.tree.data[positions]
+        found = self.tree.query_ball_point(points, _chord(radius_km) * (1 + 1e-12))
+        neighbors = {}
+        for p, hits in zip(positions, found):
+            if not include_self:
+                hits = [h for h in hits if h != p]
+            neighbors[self.node_ids[p].item()] = self.node_ids[sorted(hits)].tolist()
+        return neighbors
+
+    def neighbor_counts(self, radii, include_self=True):
+        """
+        :return: (radii, nodes) array of the number of nodes within each radius of each node
+        """
+        counts = np.array([self.tree.query_ball_point(self.tree.data, _chord(r) * (1 + 1e-12), return_length=True)
+                           for r in np.atleast_1d(radii)])
+        return counts if include_self else counts - 1
+
+    def neighbor_population(self, radius_km):
+        """
+        :return: population within radius_km of each node
+        """
+        found = self.tree.query_ball_point(self.tree.data, _chord(radius_km) * (1 + 1e-12))
+        return np.array([self.population[hits].sum() for hits in found])
+
+    def radius_summary(self, radii):
+        """
+        Nodes reached per broadcast at each radius (the sending node included, as with
+        Include_My_Node), across all nodes.
+        """
+        counts = self.neighbor_counts(radii)
+        return pd.DataFrame({
+            'radius_km': np.atleast_1d(radii),
+            'mean_nodes': counts.mean(axis=1),
+            'median_nodes': np.median(counts, axis=1),
+            'max_nodes': counts.max(axis=1),
+            'mean_population': [self.neighbor_population(r).mean() for r in np.atleast_1d(radii)]
+        }).set_index('radius_km')
+
+    def expected_broadcasts(self, radius_km, case_weights=None, coverage=1.0):
+        """
+        Expected reach of one focal response triggered by an index case.
+
+        :param case_weights: relative chance that an index case occurs in each node (e.g.
+            prevalence times population); defaults to population
+        :param coverage: fraction of reached individuals receiving the intervention
+        :return: dict with expected nodes receiving the broadcast event and expected
+            individuals receiving the intervention per index case
+        """
+        weights = self.population if case_weights is None else np.asarray(case_weights, dtype=float)
+        weights = weights / weights.sum()
+        nodes = self.neighbor_counts([radius_km])[0]
+        people = self.neighbor_population(radius_km)
+        return {
+            'radius_km': radius_km,
+            'nodes_per_case': float(weights.dot(nodes)),
+            'interventions_per_case': float(coverage * weights.dot(people))
+        }
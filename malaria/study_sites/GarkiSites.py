@@ -1,10 +1,9 @@
 import logging
 import os
 import numpy as np
-import pandas as pd
-import itertools
-from calibtool.analyzers.Helpers import grouped_df_date
-from collections import OrderedDict
+
+from malaria.study_sites.garki_reference import garki_reference_data
+from malaria.study_sites.reference_cache import cached_reference_data
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +32,7 @@ class GarkiSites(object):
         dir_path = os.path.dirname(os.path.realpath(__file__))
         self.reference_csv = os.path.join(dir_path, 'inputs', 'GarkiDB_data', 'GarkiDBparasitology_dates.csv')
 
+    @cached_reference_data
     def get_reference_data(self):
         """
         A function to convert Garki reference data locally stored in a csv file generate by code:
@@ -62,49 +62,7 @@ class GarkiSites(object):
           ...
 
         """
-        df = pd.read_csv(self.reference_csv)
-        df = df.loc[df['Village'].isin(self.metadata['village'])]
-
-        pfprBinsDensity = self.metadata['parasitemia_bins']
-        uL_per_field = 0.5 / 200.0  # from Garki PDF - page 111 - 0.5 uL per 200 views
-        pfprBins = 1 - np.exp(-np.asarray(pfprBinsDensity) * uL_per_field)
-        pfprdict = dict(zip(pfprBins, pfprBinsDensity))
-
-        mask = (df['Date'] > self.metadata['start_date']) & (df['Date'] < self.metadata['end_date'])
-        df = df.loc[mask]
-
-        bins = OrderedDict([
-            ('Date', list(df['Date'])),
-            ('Age Bin', self.metadata['age_bins']),
-            ('PfPR Bin', pfprBins)
-        ])
-        bin_tuples = list(itertools.product(*bins.values()))
-        index = pd.MultiIndex.from_tuples(bin_tuples, names=bins.keys())
-
-        df = df.rename(columns={'Age': 'Age Bin'})
-
-        df2 = grouped_df_date(df, pfprdict, index, 'Parasitemia', 'Gametocytemia')
-        df3 = grouped_df_date(df, pfprdict, index, 'Gametocytemia', 'Parasitemia')
-        dfJoined = df2.join(df3).fillna(0)
-        dfJoined = pd.concat([dfJoined['Gametocytemia'], dfJoined['Parasitemia']])
-        dfJoined.name = 'Counts'
-        dftemp = dfJoined.reset_index()
-        dftemp['Channel'] = 'PfPR by Gametocytemia and Age Bin'
-        dftemp.loc[len(dftemp)/2:, 'Channel'] = 'PfPR by Parasitemia and Age Bin'
-        dftemp = dftemp.join(dftemp.groupby(['Channel', 'Date', 'Age Bin'])['Counts'].sum(),
-                             on=['Channel', 'Date', 'Age Bin'],
-                             rsuffix='_tot')
-        dftemp['Counts'] = dftemp.groupby(['Channel', 'Date', 'Age Bin'])['Counts'].apply(lambda x: x / float(x.sum()))
-        dftemp = dftemp.set_index(['Channel', 'Date', 'Age Bin', 'PfPR Bin'])
-
-        dftemp = dftemp.reset_index()
-        dftemp['Date'] = pd.to_datetime(dftemp['Date']).dt.strftime('%b')
-        temppop = dftemp.groupby(['Channel', 'Date', 'Age Bin', 'PfPR Bin'])['Counts_tot'].apply(np.sum)
-        dftemp = dftemp.groupby(['Channel', 'Date', 'Age Bin', 'PfPR Bin'])['Counts'].apply(np.mean).reset_index()
-        dftemp['Counts_tot'] = list(temppop)
-        dftemp['Date'] = pd.to_datetime(dftemp['Date'].apply(lambda x: '1970-' + x + '-15')).dt.strftime('%j').astype(
-            'int')
-        dftemp = dftemp.sort_values(by=['Channel', 'Date'])
+        dftemp = garki_reference_data(self.reference_csv, self.metadata['village'], self.metadata)
 
         logger.debug('\n%s', dftemp)
 
@@ -5,6 +5,8 @@ from calibtool.analyzers.Helpers import season_channel_age_density_json_to_panda
 import calendar
 
 from calibtool.study_sites.DensityCalibSite import DensityCalibSite
+from malaria.study_sites.garki_reference import normalize_counts, index_columns
+from malaria.study_sites.reference_cache import cached_reference_data
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +71,7 @@ class LayeAgeDateSite(DensityCalibSite):
         }
     }
 
+    @cached_reference_data
     def get_reference_data(self, reference_type):
         super(LayeAgeDateSite, self).get_reference_data(reference_type)
 
@@ -80,12 +83,12 @@ class LayeAgeDateSite(DensityCalibSite):
         reference_data = reference_data.rename(columns={'Season': 'Date'})
         reference_data['Date'] = reference_data['Date'].apply(lambda x: list(self.metadata['seasons_by_month'].keys())[self.metadata['seasons_by_month'].values().index(x)])
         reference_data['Date'] = reference_data['Date'].apply(lambda x: (list(calendar.month_name).index(x)-1)*30 + 15)
-        reference_data = reference_data.sort_values(['Channel', 'Date', 'Age Bin', 'PfPR Bin'])
-        counts_tot_list = list(reference_data.groupby(['Channel', 'Date', 'Age Bin'])['Counts'].apply(np.sum))
-        counts_tot = [[a]*len(self.metadata['parasitemia_bins']) for a in counts_tot_list]
-        reference_data['Counts_tot'] = [item for sublist in counts_tot for item in sublist]
-        reference_data['Counts'] = reference_data.groupby(['Channel', 'Date', 'Age Bin'])['Counts'].apply(lambda x: x / float(x.sum()))
-        reference = reference_data.set_index(['Channel', 'Date', 'Age Bin', 'PfPR Bin'])
+        reference_data = reference_data.sort_values(index_columns)
+        counts = reference_data['Counts'].values.reshape(-1, len(self.metadata['parasitemia_bins']))
+        fractions, totals = normalize_counts(counts)
+        reference_data['Counts_tot'] = totals.ravel()
+        reference_data['Counts'] = fractions.ravel()
+        reference = reference_data.set_index(index_columns)
 
         return reference
 
@@ -1,12 +1,10 @@
 import logging
 import os
 import numpy as np
-import pandas as pd
-import itertools
-from calibtool.analyzers.Helpers import grouped_df_date
-from collections import OrderedDict
 
 from calibtool.study_sites.DensityCalibSite import DensityCalibSite
+from malaria.study_sites.garki_reference import garki_reference_data, index_columns
+from malaria.study_sites.reference_cache import cached_reference_data
 
 logger = logging.getLogger(__name__)
 
@@ -28,59 +26,16 @@ class RafinMarkeAgeDateSite(DensityCalibSite):
         'start_date': '1970-11-01'
     }
 
+    reference_csv = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                 'inputs', 'GarkiDB_data', 'GarkiDBparasitology_dates.csv')
+
+    @cached_reference_data
     def get_reference_data(self, reference_type):
         super(RafinMarkeAgeDateSite, self).get_reference_data(reference_type)
 
-        dir_path = os.path.dirname(os.path.realpath(__file__))
-        reference_csv = os.path.join(dir_path, 'inputs', 'GarkiDB_data', 'GarkiDBparasitology_dates.csv')
-
-        df = pd.read_csv(reference_csv)
-        df = df.loc[df['Village'] == self.metadata['village']]
-
-        pfprBinsDensity = self.metadata['parasitemia_bins']
-        uL_per_field = 0.5 / 200.0  # from Garki PDF - page 111 - 0.5 uL per 200 views
-        pfprBins = 1 - np.exp(-np.asarray(pfprBinsDensity) * uL_per_field)
-        pfprdict = dict(zip(pfprBins, pfprBinsDensity))
-
-        mask = (df['Date'] > self.metadata['start_date']) & (df['Date'] < self.metadata['end_date'])
-        df = df.loc[mask]
-
-        bins = OrderedDict([
-            ('Date', list(df['Date'])),
-            ('Age Bin', self.metadata['age_bins']),
-            ('PfPR Bin', pfprBins)
-        ])
-        bin_tuples = list(itertools.product(*bins.values()))
-        index = pd.MultiIndex.from_tuples(bin_tuples, names=bins.keys())
-
-        df = df.rename(columns={'Age': 'Age Bin'})
-
-        df2 = grouped_df_date(df, pfprdict, index, 'Parasitemia', 'Gametocytemia')
-        df3 = grouped_df_date(df, pfprdict, index, 'Gametocytemia', 'Parasitemia')
-        dfJoined = df2.join(df3).fillna(0)
-        dfJoined = pd.concat([dfJoined['Gametocytemia'], dfJoined['Parasitemia']])
-        dfJoined.name = 'Counts'
-        dftemp = dfJoined.reset_index()
-        dftemp['Channel'] = 'Smeared PfPR by Gametocytemia and Age Bin'
-        dftemp.loc[len(dftemp)/2:, 'Channel'] = 'Smeared PfPR by Parasitemia and Age Bin'
-        dftempsumlist = list(dftemp.groupby(['Channel', 'Date', 'Age Bin'])['Counts'].sum())
-        dftemplist = [[s]*len(dftemp['PfPR Bin'].unique()) for s in dftempsumlist]
-        dftemp['Counts_tot'] = [item for sublist in dftemplist for item in sublist]
-        # dftemp = dftemp.join(dftemp.groupby(['Channel', 'Date', 'Age Bin'])['Counts'].sum(),
-        #                      on=['Channel', 'Date', 'Age Bin'],
-        #                      rsuffix='_tot', dtype=float)
-        dftemp['Counts'] = dftemp.groupby(['Channel', 'Date', 'Age Bin'])['Counts'].apply(lambda x: x / float(x.sum()))
-        dftemp = dftemp.set_index(['Channel', 'Date', 'Age Bin', 'PfPR Bin'])
-
-        dftemp = dftemp.reset_index()
-        dftemp['Date'] = pd.to_datetime(dftemp['Date']).dt.strftime('%b')
-        temppop = dftemp.groupby(['Channel', 'Date', 'Age Bin', 'PfPR Bin'])['Counts_tot'].apply(np.sum)
-        dftemp = dftemp.groupby(['Channel', 'Date', 'Age Bin', 'PfPR Bin'])['Counts'].apply(np.mean).reset_index()
-        dftemp['Counts_tot'] = list(temppop)
-        dftemp['Date'] = pd.to_datetime(dftemp['Date'].apply(lambda x: '1970-' + x + '-15')).dt.strftime('%j').astype(
-            'int')
-        dftemp = dftemp.sort_values(by=['Channel', 'Date'])
-        reference = dftemp.set_index(['Channel', 'Date', 'Age Bin', 'PfPR Bin'])
+        dftemp = garki_reference_data(self.reference_csv, self.metadata['village'], self.metadata,
+                                      channel_prefix='Smeared ')
+        reference = dftemp.set_index(index_columns)
 
         logger.debug('\n%s', dftemp)
 
@@ -1,4 +1,5 @@
 from site_setup_functions import *
+from malaria.interventions.node_coverage import add_ITN_by_node_fn
 
 burn_years = 50
 sim_duration = burn_years*365 + 2*365
@@ -17,6 +18,8 @@ itn_fracs_2013 = [0.65, 0.2, 0.15]
 days_in_month = [0, 31, 59, 214, 61]
 hs_scale_by_month = [0.6, 0.9, 1, 0.8]
 
+coverage_fname = 'C:/Users/jgerardin/work/households_as_nodes/bbondo_filled_all_hs_itn_cov.json'
+
 round_days = [365*(burn_years-1) + 355 - msat_offset] + [365*burn_years + x*60 +msat_day - msat_offset for x in range(3)] + [365*(burn_years + 1) + x*60 +msat_day - msat_offset for x in range(3)]
 
 setup_functions = [ config_setup_fn(duration=sim_duration) ,
@@ -53,12 +56,12 @@ setup_functions = [ config_setup_fn(duration=sim_duration) ,
                                              "WATER_VEGETATION": 2e6}),
                     filtered_report_fn(start=365*(burn_years-1), end=sim_duration, nodes=range(745)),
                     filtered_report_fn(start=365*(burn_years-1), end=sim_duration, nodes=[1001], description='worknode'),
-                    add_itn_by_node_id_fn('C:/Users/jgerardin/work/households_as_nodes/bbondo_filled_all_hs_itn_cov.json', itn_dates_2012, itn_fracs_2012, 'itn2012cov',
+                    add_ITN_by_node_fn(coverage_fname, 'itn2012cov', itn_dates_2012, itn_fracs_2012,
                                           waning = {'Usage_Config': {"Expected_Discard_Time": 270}}),
-                    add_itn_by_node_id_fn('C:/Users/jgerardin/work/households_as_nodes/bbondo_filled_all_hs_itn_cov.json', itn_dates_2013, itn_fracs_2013, 'itn2013cov',
+                    add_ITN_by_node_fn(coverage_fname, 'itn2013cov', itn_dates_2013, itn_fracs_2013,
                                           waning={'Usage_Config' : {"Expected_Discard_Time": 270}}),
-                    #add_HS_by_node_id_fn('C:/Users/jgerardin/work/households_as_nodes/bbondo_filled_all_hs_itn_cov.json', start=max([0,(burn_years-5)*365])),
-                    add_seasonal_HS_by_node_id_fn('C:/Users/jgerardin/work/households_as_nodes/bbondo_filled_all_hs_itn_cov.json',
+                    #add_HS_by_node_id_fn(coverage_fname, start=max([0,(burn_years-5)*365])),
+                    add_seasonal_HS_by_node_id_fn(coverage_fname,
                                                   days_in_month, hs_scale_by_month, start=max([0,(burn_years-5)*365])),
 
                     add_drug_campaign_fn('MSAT', 'AL',
@@ -0,0 +1,103 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+uL_per_field = 0.5 / 200.0  # from Garki PDF - page 111 - 0.5 uL per 200 views
+
+garki_columns = ['Village', 'Date', 'Age', 'Parasitemia', 'Gametocytemia']
+density_columns = ['Gametocytemia', 'Parasitemia']
+index_columns = ['Channel', 'Date', 'Age Bin', 'PfPR Bin']
+
+
+def fields_positive_bins(parasitemia_bins):
+    """
+    Convert parasite density bin edges (per uL) to fraction-of-fields-positive edges.
+    """
+    return 1 - np.exp(-np.asarray(parasitemia_bins, dtype=float) * uL_per_field)
+
+
+def bin_index(values, upper_edges):
+    """
+    Index of the (previous edge, edge] bin holding each value; len(upper_edges) when above the last edge.
+    """
+    return np.digitize(np.asarray(values, dtype=float), np.asarray(upper_edges, dtype=float), right=True)
+
+
+def histogram_counts(group_idx, age_idx, density_idx, n_groups, n_ages, n_densities):
+    """
+    Counts over (group, age bin, density bin) from per-observation bin indices.
+
+    Observations outside the age or density bins are dropped.
+    """
+    keep = (age_idx < n_ages) & (density_idx < n_densities)
+    flat = (group_idx[keep] * n_ages + age_idx[keep]) * n_densities + density_idx[keep]
+    counts = np.bincount(flat, minlength=n_groups * n_ages * n_densities)
+    return counts.reshape(n_groups, n_ages, n_densities)
+
+
+def normalize_counts(counts):
+    """
+    Normalize counts over the last axis.
+
+    :return: (fractions, totals) with totals broadcast to the shape of counts; empty groups get fraction 0
+    """
+    counts = np.asarray(counts, dtype=float)
+    totals = counts.sum(axis=-1, keepdims=True)
+    fractions = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+    return fractions, np.broadcast_to(totals, counts.shape)
+
+
+def mid_month_day_of_year(month):
+    return datetime.date(1970, month, 15).timetuple().tm_yday
+
+
+def garki_reference_data(reference_csv, villages, metadata, channel_prefix=''):
+    """
+    Bin Garki parasitology surveys by month, age and density for one or more villages.
+
+    Surveys between metadata start_date and end_date (exclusive) are binned by age and by
+    gametocyte and parasite density. Within each survey date and age bin the density counts
+    are normalized; these fractions are then averaged over the survey dates of each month,
+    and the totals summed.
+
+    :param reference_csv: GarkiDBparasitology_dates.csv
+    :param villages: village name or list of names
+    :param metadata: site metadata with age_bins, parasitemia_bins, start_date and end_date
+    :param channel_prefix: prefix of the channel names, e.g. 'Smeared '
+    :return: dataframe with Channel, Date (day of year), Age Bin, PfPR Bin, Counts and Counts_tot columns
+    """
+    df = pd.read_csv(reference_csv, usecols=garki_columns)
+    df = df.loc[df['Village'].isin(np.atleast_1d(villages))]
+    df = df.loc[(df['Date'] > metadata['start_date']) & (df['Date'] < metadata['end_date'])]
+
+    age_bins = metadata['age_bins']
+    density_bins = metadata['parasitemia_bins']
+    pfpr_bins = fields_positive_bins(density_bins)
+
+    dates, date_idx = np.unique(df['Date'].values, return_inverse=True)
+    months, month_idx = np.unique(pd.to_datetime(dates).month, return_inverse=True)
+    age_idx = bin_index(df['Age'].values, age_bins)
+
+    # month x date indicator used to average fractions and sum totals over the survey dates of a month
+    in_month = np.zeros((len(months), len(dates)))
+    in_month[month_idx, np.arange(len(dates))] = 1
+
+    frames = []
+    for column in density_columns:
+        counts = histogram_counts(date_idx, age_idx, bin_index(df[column].values, pfpr_bins),
+                                  len(dates), len(age_bins), len(density_bins))
+        fractions, totals = normalize_counts(counts)
+
+        observed = in_month.dot((totals[..., 0] > 0).reshape(len(dates), -1)).reshape(len(months), len(age_bins), 1)
+        fraction_sum = in_month.dot(fractions.reshape(len(dates), -1)).reshape(len(months), len(age_bins), -1)
+        monthly_fractions = np.divide(fraction_sum, observed, out=np.zeros_like(fraction_sum), where=observed > 0)
+        monthly_totals = in_month.dot(totals.reshape(len(dates), -1)).reshape(monthly_fractions.shape)
+
+        grid = pd.MultiIndex.from_product([[channel_prefix + 'PfPR by %s and Age Bin' % column],
+                                           [mid_month_day_of_year(m) for m in months],
+                                           age_bins, density_bins], names=index_columns)
+        frames.append(pd.DataFrame({'Counts': monthly_fractions.ravel(),
+                                    'Counts_tot': monthly_totals.ravel()}, index=grid).reset_index())
+
+    reference = pd.concat(frames, ignore_index=True)
+    return reference.sort_values(by=index_columns).reset_index(drop=True)
@@ -0,0 +1,63 @@
+import json
+import logging
+from functools import lru_cache
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def load_json(path):
+    """
+    Parsed JSON file, read once per path and shared by every caller; do not modify it.
+    """
+    logger.debug('Loading %s', path)
+    with open(path) as fin:
+        return json.load(fin)
+
+
+@lru_cache(maxsize=None)
+def load_csv(path):
+    """
+    CSV file as a DataFrame, read once per path and shared by every caller; do not modify it.
+    """
+    logger.debug('Loading %s', path)
+    return pd.read_csv(path)
+
+
+@lru_cache(maxsize=None)
+def load_subsets(path, n_nodes):
+    """
+    Named node subsets of a household-as-node site, plus 'all' covering every household.
+    """
+    subsets = dict(load_json(path))
+    subsets['all'] = range(n_nodes)
+    return subsets
+
+
+@lru_cache(maxsize=None)
+def coverage_table(path):
+    """
+    Household intervention coverage file (the *_hs_itn_cov.json inputs: a 'nodes' list of
+    per-node dicts with an 'id' and one coverage value per channel, e.g. 'itn2012cov') as a
+    DataFrame indexed by node id, with one column per channel.
+    """
+    return pd.DataFrame(load_json(path)['nodes']).set_index('id').sort_index()
+
+
+def lazy_attributes(namespace, **builders):
+    """
+    Module-level __getattr__ building expensive module attributes on first access:
+
+        __getattr__ = lazy_attributes(globals(), setup_functions=get_setup_functions)
+
+    The built value is stored in the module namespace, so later lookups are plain globals.
+    Code inside the module must call the builder rather than use the bare name.
+    """
+    def __getattr__(name):
+        if name not in builders:
+            raise AttributeError('module %r has no attribute %r' % (namespace['__name__'], name))
+        namespace[name] = builders[name]()
+        return namespace[name]
+    return __getattr__
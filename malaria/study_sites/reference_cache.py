@@ -0,0 +1,110 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Bump when the reference data pipelines change so stale entries are not reused
+cache_version = 2
+
+cache_dir = os.environ.get('MALARIA_REFERENCE_CACHE',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'malaria', 'reference_data'))
+enabled = os.environ.get('MALARIA_REFERENCE_CACHE_DISABLE', '0') != '1'
+
+_file_hashes = {}
+
+
+def file_hash(path):
+    """
+    SHA-1 of a file's content, memoized on path, size and modification time.
+    """
+    stat = os.stat(path)
+    key = (os.path.realpath(path), stat.st_size, stat.st_mtime)
+    if key not in _file_hashes:
+        sha = hashlib.sha1()
+        with open(path, 'rb') as fin:
+            for chunk in iter(lambda: fin.read(1 << 20), b''):
+                sha.update(chunk)
+        _file_hashes[key] = sha.hexdigest()
+    return _file_hashes[key]
+
+
+def reference_cache_key(site, *args):
+    """
+    Content key for a site's reference data.
+
+    Combines the site class, the call arguments, the site metadata and reference_dict, and
+    the hash of the site's reference_csv when it has one.
+    """
+    cls = type(site)
+    parts = {
+        'version': cache_version,
+        'site': '%s.%s' % (cls.__module__, cls.__name__),
+        'args': args,
+        'metadata': getattr(site, 'metadata', None),
+        'reference_dict': getattr(site, 'reference_dict', None),
+        'reference_csv': file_hash(site.reference_csv) if getattr(site, 'reference_csv', None) else None
+    }
+    serialized = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(cache_dir, key + '.pkl')
+
+
+def load(key):
+    """
+    :return: the cached object for key, or None if there is no usable entry
+    """
+    if not enabled or not os.path.exists(_cache_path(key)):
+        return None
+    try:
+        with open(_cache_path(key), 'rb') as fin:
+            return pickle.load(fin)
+    except Exception as e:
+        logger.warning('Ignoring unreadable reference data cache entry %s: %s', key, e)
+        return None
+
+
+def store(key, value):
+    if not enabled:
+        return
+    try:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fout:
+            pickle.dump(value, fout, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _cache_path(key))
+    except Exception as e:
+        logger.warning('Could not write reference data cache entry %s: %s', key, e)
+
+
+def clear():
+    if os.path.isdir(cache_dir):
+        for f in os.listdir(cache_dir):
+            if f.endswith('.pkl'):
+                os.remove(os.path.join(cache_dir, f))
+
+
+def cached_reference_data(fn):
+    """
+    Decorator for get_reference_data methods: reuse the finished reference frame from disk
+    whenever the site class, arguments, metadata and input file are unchanged.
+    """
+    @functools.wraps(fn)
+    def wrapper(self, *args):
+        key = reference_cache_key(self, *args)
+        reference = load(key)
+        if reference is None:
+            reference = fn(self, *args)
+            store(key, reference)
+        else:
+            logger.debug('Loaded %s reference data from cache %s', type(self).__name__, key)
+        return reference
+    return wrapper
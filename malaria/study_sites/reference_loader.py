@@ -0,0 +1,72 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from malaria.study_sites import reference_cache
+from malaria.study_sites.registry import get_site, load_entry_point, site_entry_points
+
+logger = logging.getLogger(__name__)
+
+
+def _call_args(reference_type):
+    return () if reference_type is None else (reference_type,)
+
+
+def _is_cacheable(site):
+    # Only sites whose reference inputs are all part of the cache key
+    return bool(getattr(site, 'reference_csv', None) or getattr(site, 'reference_dict', None))
+
+
+def _load_site_reference(entry_point, reference_type, site_args):
+    # Workers resolve the entry point themselves so sites registered at runtime also work
+    # when the pool does not fork
+    site = load_entry_point(entry_point)(*site_args)
+    return site.get_reference_data(*_call_args(reference_type))
+
+
+def load_reference_data(sites, site_args={}, processes=None, use_cache=True):
+    """
+    Build the reference data of several calibration sites concurrently.
+
+    Entries already in the persistent reference cache are loaded directly in this process;
+    only the missing ones are built, in parallel across a process pool, and then cached.
+
+    :param sites: dict of registered site name to reference type (None for sites whose
+        get_reference_data takes no argument, e.g. GarkiSites)
+    :param site_args: optional dict of site name to constructor arguments, e.g. {'GarkiSites': ('Matsari',)}
+    :param processes: size of the process pool; defaults to the number of CPUs
+    :param use_cache: look up and store results in :py:mod:`reference_cache`
+    :return: dict of site name to reference data
+    """
+    references = {}
+    keys = {}
+
+    for name, reference_type in sites.items():
+        if not use_cache:
+            break
+        site = get_site(name, *site_args.get(name, ()))
+        if not _is_cacheable(site):
+            continue
+        keys[name] = reference_cache.reference_cache_key(site, *_call_args(reference_type))
+        cached = reference_cache.load(keys[name])
+        if cached is not None:
+            references[name] = cached
+
+    missing = [name for name in sites if name not in references]
+    logger.info('Reference data: %d sites from cache, %d to build', len(references), len(missing))
+
+    if len(missing) == 1:
+        name = missing[0]
+        references[name] = _load_site_reference(site_entry_points[name], sites[name], site_args.get(name, ()))
+    elif missing:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {name: pool.submit(_load_site_reference, site_entry_points[name], sites[name],
+                                         site_args.get(name, ()))
+                       for name in missing}
+            for name, future in futures.items():
+                references[name] = future.result()
+
+    for name in missing:
+        if name in keys:
+            reference_cache.store(keys[name], references[name])
+
+    return references
@@ -0,0 +1,113 @@
+import importlib
+import json
+import subprocess
+import sys
+
+# Site name -> "module:Class" entry point. Nothing is imported until a site is requested.
+site_entry_points = {name: 'malaria.study_sites.%s:%s' % (name, name) for name in [
+    'DapelogoAgeDateSite',
+    'DapelogoCalibSite',
+    'DapelogoInfCalibSite',
+    'DapelogoInfectiousnessCalibSite',
+    'DapelogoSite',
+    'DielmoCalibSite',
+    'GarkiSites',
+    'LayeAgeDateSite',
+    'LayeCalibSite',
+    'LayeInfectiousnessCalibSite',
+    'LayeSite',
+    'MagudeEntoCalibSite',
+    'MatsariAgeDateSite',
+    'MatsariAgeSeasonCalibSite',
+    'MatsariAgeSeasonCalibSiteBabies',
+    'MatsariCalibSite',
+    'NamawalaCalibSite',
+    'NdiopCalibSite',
+    'RafinMarkeAgeDateSite',
+    'RafinMarkeAgeSeasonCalibSite',
+    'RafinMarkeAgeSeasonCalibSiteBabies',
+    'RafinMarkeCalibSite',
+    'SugungumAgeDateSite',
+    'SugungumAgeSeasonCalibSite',
+    'SugungumAgeSeasonCalibSiteBabies',
+    'SugungumCalibSite'
+]}
+# Sites whose module is not named after the class
+site_entry_points['MoineSpatialCalibSite'] = 'malaria.study_sites.MoinespatialCalibSite:MoineSpatialCalibSite'
+
+_site_classes = {}
+
+
+def register_site(name, entry_point):
+    """
+    Register a site class by "module:Class" entry point without importing it.
+    """
+    site_entry_points[name] = entry_point
+    _site_classes.pop(name, None)
+
+
+def available_sites():
+    return sorted(site_entry_points.keys())
+
+
+def load_entry_point(entry_point):
+    module_name, class_name = entry_point.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_site_class(name):
+    """
+    Import and return the class registered under name. The module (and its calibtool,
+    pandas and reference data imports) is only loaded on the first request.
+    """
+    if name not in _site_classes:
+        if name not in site_entry_points:
+            raise Exception("Don't know site: %s. Available sites: %s" % (name, ', '.join(available_sites())))
+        _site_classes[name] = load_entry_point(site_entry_points[name])
+    return _site_classes[name]
+
+
+def get_site(name, *args, **kwargs):
+    """
+    Instantiate the site registered under name.
+    """
+    return get_site_class(name)(*args, **kwargs)
+
+
+_benchmark_script = """
+import json, time
+t0 = time.time()
+from malaria.study_sites import registry
+t1 = time.time()
+error = None
+try:
+    registry.get_site_class(%r)
+except Exception as e:
+    error = '%%s: %%s' %% (type(e).__name__, e)
+t2 = time.time()
+print(json.dumps({'registry_import': t1 - t0, 'site_load': t2 - t1, 'error': error}))
+"""
+
+
+def benchmark_startup(names=None, python=sys.executable):
+    """
+    Time a cold start for each site in a fresh interpreter: importing the registry, then
+    resolving the site class.
+
+    :param names: sites to benchmark; all registered sites by default
+    :return: list of dicts with site, registry_import and site_load seconds, and any import error
+    """
+    results = []
+    for name in names or available_sites():
+        output = subprocess.check_output([python, '-c', _benchmark_script % name])
+        result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+        result['site'] = name
+        results.append(result)
+    return results
+
+
+if __name__ == '__main__':
+    results = benchmark_startup(sys.argv[1:] or None)
+    print('%-36s %12s %12s' % ('site', 'registry (s)', 'site (s)'))
+    for r in results:
+        print('%-36s %12.4f %12.4f %s' % (r['site'], r['registry_import'], r['site_load'], r['error'] or ''))